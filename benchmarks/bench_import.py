@@ -0,0 +1,87 @@
+"""Cold-start import cost of the app and its modules, from `python -X importtime`
+
+Usage: python -m benchmarks.bench_import [--top 15] [--app]
+
+Each target is imported in a fresh interpreter. The report lists the
+cumulative import time per target, the modules with the largest self time and which
+heavy optional dependencies it loaded. With --app, the Current Weather page
+is also rendered once headlessly (streamlit AppTest) to time first paint.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ['sklearn', 'xgboost', 'plotly', 'plotly.express', 'joblib', 'scipy']
+
+TARGETS = ['main', 'utils.weather_api', 'utils.data_processor', 'utils.visualizations', 'utils.ml_models']
+
+FIRST_PAINT = """
+import json, os, sys, time
+os.environ.setdefault('OPENWEATHERMAP_API_KEY', 'benchmark')
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file('main.py', default_timeout=120).run()
+elapsed = time.perf_counter() - start
+print(json.dumps({'seconds': elapsed, 'errors': [str(e.value) for e in at.exception],
+                  'modules': sorted(m for m in %r if m in sys.modules)}))
+"""
+
+def parse_importtime(stderr):
+    """Return {module: (self_us, cumulative_us, depth)} from -X importtime output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return modules
+
+def measure(module, top):
+    check = (f"import json, sys, {module}; "
+             f"print(json.dumps(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)))")
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', check], capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    modules = parse_importtime(proc.stderr)
+    slowest = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    return {
+        'import_ms': modules[module][1] / 1000,
+        'wall_ms': 1000 * wall,
+        'modules': len(modules),
+        'heavy_loaded': json.loads(proc.stdout.strip().splitlines()[-1]),
+        'slowest_self_ms': [(name, self_us / 1000) for name, (self_us, _, _) in slowest]
+    }
+
+def first_paint():
+    proc = subprocess.run(
+        [sys.executable, '-c', FIRST_PAINT % HEAVY_MODULES], capture_output=True, text=True
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--top', type=int, default=5)
+    parser.add_argument('--app', action='store_true', help="Also time first paint of the default page")
+    parser.add_argument('--json', action='store_true', help="Print the raw report as JSON")
+    args = parser.parse_args()
+
+    report = {module: measure(module, args.top) for module in TARGETS}
+    if args.app:
+        report['first_paint'] = first_paint()
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for name, result in report.items():
+            if name == 'first_paint':
+                print(f"\nfirst paint (Current Weather): {result['seconds']:.2f}s, "
+                      f"heavy modules loaded: {', '.join(result['modules']) or 'none'}")
+                continue
+            print(f"{name:<22} {result['import_ms']:>8.1f} ms import {result['wall_ms']:>8.1f} ms wall  "
+                  f"{result['modules']:>5} modules  heavy: {', '.join(result['heavy_loaded']) or 'none'}")
+            for module, ms in result['slowest_self_ms']:
+                print(f"    {module:<44} {ms:>8.1f} ms self")
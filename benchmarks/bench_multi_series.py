@@ -0,0 +1,51 @@
+"""Scaling of per-city model training with the number of worker processes
+
+Usage: python -m benchmarks.bench_multi_series [--cities 1000] [--days 365] [--jobs 1 2 4 -1]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.multi_series import MultiSeriesTrainer
+
+def make_frame(cities, days, seed=42):
+    """Long-format daily observations for many cities with per-city climate offsets"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2023-01-01', periods=days)
+    rows = cities * days
+    day_of_year = np.tile(dates.dayofyear.to_numpy(), cities)
+    humidity = rng.normal(60, 10, rows)
+    pressure = rng.normal(1013, 5, rows)
+    temperature = (np.repeat(rng.normal(15, 5, cities), days)
+                   + 10 * np.sin(2 * np.pi * (day_of_year - 100) / 365.25)
+                   - 0.1 * (humidity - 60) + rng.normal(0, 2, rows))
+    return pd.DataFrame({
+        'date': np.tile(dates.to_numpy(), cities),
+        'city': pd.Categorical(np.repeat([f'city_{i:05d}' for i in range(cities)], days)),
+        'temperature': temperature,
+        'humidity': humidity,
+        'pressure': pressure
+    })
+
+def run(cities, days, jobs_list, model_name):
+    df = make_frame(cities, days)
+    print(f"{'n_jobs':>7} {'cities':>7} {'seconds':>9} {'cities_per_sec':>15} {'speedup':>8}")
+    baseline = None
+    for n_jobs in jobs_list:
+        start = time.perf_counter()
+        trainer = MultiSeriesTrainer(model_name, n_jobs=n_jobs).fit(df)
+        seconds = time.perf_counter() - start
+        baseline = baseline or seconds
+        print(f"{n_jobs:>7} {len(trainer.models_):>7} {seconds:>9.2f} "
+              f"{len(trainer.models_) / seconds:>15.1f} {baseline / seconds:>8.2f}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cities', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--jobs', type=int, nargs='+', default=[1, 2, 4, -1])
+    parser.add_argument('--model', default='Linear Regression')
+    args = parser.parse_args()
+    run(args.cities, args.days, args.jobs, args.model)
@@ -0,0 +1,81 @@
+"""Load test for the inference service: measures requests/sec and client-side latency
+
+Usage: python -m benchmarks.load_test --url http://127.0.0.1:8600 --requests 5000 --concurrency 32
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+
+def worker(url, features, count, rows_per_request, latencies, errors, seed):
+    rng = np.random.default_rng(seed)
+    parsed = urlparse(url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=30)
+    for _ in range(count):
+        rows = rng.normal(50, 20, (rows_per_request, len(features))).round(2).tolist()
+        body = json.dumps({'rows': rows})
+        start = time.perf_counter()
+        try:
+            conn.request('POST', '/predict', body, {'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+                continue
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(str(e))
+            conn.close()
+            conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+
+def fetch_json(url, path):
+    parsed = urlparse(url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=10)
+    conn.request('GET', path)
+    data = json.loads(conn.getresponse().read())
+    conn.close()
+    return data
+
+def run(url, total_requests, concurrency, rows_per_request):
+    features = fetch_json(url, '/health')['features']
+    per_worker = max(1, total_requests // concurrency)
+    latencies, errors = [], []
+    threads = [
+        threading.Thread(target=worker, args=(url, features, per_worker, rows_per_request, latencies, errors, i))
+        for i in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array(latencies)
+    result = {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'concurrency': concurrency,
+        'rows_per_request': rows_per_request,
+        'seconds': elapsed,
+        'requests_per_sec': len(latencies) / elapsed,
+        'client_p50_ms': 1000 * float(np.percentile(latencies, 50)) if len(latencies) else None,
+        'client_p99_ms': 1000 * float(np.percentile(latencies, 99)) if len(latencies) else None,
+        'server': fetch_json(url, '/metrics')
+    }
+    return result
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8600')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--rows-per-request', type=int, default=1)
+    args = parser.parse_args()
+    print(json.dumps(run(args.url, args.requests, args.concurrency, args.rows_per_request), indent=2))
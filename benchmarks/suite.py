@@ -0,0 +1,234 @@
+"""End-to-end benchmark suite: ingest, features, training, inference and figures
+
+Usage:
+    python -m benchmarks.suite run --rows 10000 100000 1000000 10000000 --cities 10 --output baseline.json
+    python -m benchmarks.suite compare baseline.json current.json [--tolerance 0.2]
+
+`run` generates sample data with `WeatherDataProcessor.generate_sample_data`
+scaled to each row count (split across `--cities` cities, hourly), then times
+every stage and records its wall time and peak RSS. Each size runs in a fresh
+interpreter, `--repeat` times, keeping the best result per stage. `compare`
+flags stages whose time or peak memory grew by more than the tolerance and
+exits with status 1 if any did.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+from utils.data_processor import peak_rss_mb
+
+MODELS = ['Linear Regression', 'Random Forest', 'XGBoost']
+
+def reset_peak_rss():
+    """Reset the kernel's peak RSS counter so the next reading covers one stage (Linux only)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+@contextmanager
+def stage(results, name):
+    """Time a block and record its peak RSS; extra metrics can be added to the yielded dict"""
+    extra = {}
+    reset_peak_rss()
+    start = time.perf_counter()
+    yield extra
+    results[name] = {'seconds': time.perf_counter() - start, 'peak_rss_mb': peak_rss_mb(), **extra}
+
+def slug(name):
+    return name.lower().replace(' ', '_')
+
+def run_size(rows, cities, models, max_train_rows):
+    """Run every stage for one dataset size in this process and return {stage: metrics}"""
+    from utils.data_processor import WeatherDataProcessor
+    from utils.features import EXTENDED_FEATURE_SPEC
+    from utils.ml_models import WeatherPredictor
+    from utils.visualizations import WeatherVisualizer
+
+    results = {}
+    processor = WeatherDataProcessor()
+    with stage(results, 'generate') as extra:
+        df = processor.generate_sample_data(n_cities=cities, periods=max(1, rows // cities), freq='h')
+        extra['rows'] = len(df)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'weather.csv')
+        df.to_csv(path, index=False)
+        with stage(results, 'ingest_csv') as extra:
+            _, message = WeatherDataProcessor().process_uploaded_data(path)
+            extra['ok'] = message == "Data processed successfully"
+        with stage(results, 'ingest_csv_chunked') as extra:
+            _, message = WeatherDataProcessor().process_uploaded_data(path, chunksize=max(10_000, rows // 10))
+            extra['ok'] = message == "Data processed successfully"
+
+    with stage(results, 'prepare_ml_data'):
+        X, y = processor.prepare_ml_data()
+    with stage(results, 'prepare_ml_data_extended'):
+        processor.prepare_ml_data(EXTENDED_FEATURE_SPEC)
+
+    # Training cost grows superlinearly for the forests, so large sizes train on a prefix
+    X_train, y_train = X.iloc[:max_train_rows], y.iloc[:max_train_rows]
+    training = None
+    for model_name in models:
+        predictor = WeatherPredictor(n_jobs=-1)
+        with stage(results, f'train_{slug(model_name)}') as extra:
+            training = predictor.train_model(X_train, y_train, model_name)
+            extra['rows'] = len(X_train)
+            extra['ok'] = training is not None
+        with stage(results, f'predict_{slug(model_name)}'):
+            predictor.predict(X)
+        predict = results[f'predict_{slug(model_name)}']
+        predict['rows_per_sec'] = len(X) / predict['seconds']
+
+    figures = {
+        'temperature_trend': lambda: WeatherVisualizer.plot_temperature_trend(df),
+        'correlation_matrix': lambda: WeatherVisualizer.plot_correlation_matrix(df),
+    }
+    if training is not None:
+        figures['prediction_results'] = lambda: WeatherVisualizer.plot_prediction_results(
+            training['test_actual'], training['test_predictions'], training['test_features'].index,
+            training['test_lower'], training['test_upper']
+        )
+    # Warm up plotly's lazily built validators so the first figure is not charged for them
+    WeatherVisualizer.plot_temperature_trend(df.head(10))
+    WeatherVisualizer.plot_correlation_matrix(df.head(10)).to_json()
+    for name, build in figures.items():
+        with stage(results, f'figure_{name}_build'):
+            fig = build()
+        with stage(results, f'figure_{name}_json') as extra:
+            extra['bytes'] = len(fig.to_json())
+    return results
+
+def best_of(runs):
+    """Merge repeated runs of one size, keeping the fastest time and lowest peak RSS per stage"""
+    merged = {}
+    for run in runs:
+        for name, metrics in run.items():
+            if name not in merged:
+                merged[name] = dict(metrics)
+                continue
+            merged[name]['seconds'] = min(merged[name]['seconds'], metrics['seconds'])
+            if metrics.get('peak_rss_mb') is not None:
+                merged[name]['peak_rss_mb'] = min(merged[name]['peak_rss_mb'], metrics['peak_rss_mb'])
+    return merged
+
+def run(rows_list, cities, models, max_train_rows, repeat, output):
+    import numpy as np
+    import pandas as pd
+    import sklearn
+
+    report = {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'sklearn': sklearn.__version__,
+            'cities': cities,
+            'models': models,
+            'max_train_rows': max_train_rows
+        },
+        'results': {}
+    }
+    for rows in rows_list:
+        runs = []
+        for _ in range(repeat):
+            # A fresh interpreter per size keeps caches and peak RSS from leaking between runs
+            proc = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.suite', '_size', '--rows', str(rows), '--cities', str(cities),
+                 '--max-train-rows', str(max_train_rows), '--models', *models],
+                capture_output=True, text=True
+            )
+            if proc.returncode != 0:
+                raise RuntimeError(f"Benchmark for {rows} rows failed:\n{proc.stderr}")
+            runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+        report['results'][str(rows)] = best_of(runs)
+        print_results(rows, report['results'][str(rows)])
+
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {output}")
+
+def print_results(rows, results):
+    print(f"\n{rows:,} rows")
+    print(f"  {'stage':<36} {'seconds':>9} {'peak_rss_mb':>12}")
+    for name, metrics in results.items():
+        rss = metrics.get('peak_rss_mb')
+        print(f"  {name:<36} {metrics['seconds']:>9.3f} {rss if rss is not None else float('nan'):>12.1f}")
+
+def compare(baseline_path, current_path, tolerance, min_seconds, min_mb):
+    """Print per-stage changes and return the list of regressions"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)['results']
+    with open(current_path) as f:
+        current = json.load(f)['results']
+
+    regressions = []
+    print(f"{'rows':>10} {'stage':<36} {'base_s':>8} {'cur_s':>8} {'time':>7} {'base_mb':>8} {'cur_mb':>8} {'rss':>7}")
+    for rows in sorted(set(baseline) & set(current), key=int):
+        for name in baseline[rows]:
+            if name not in current[rows]:
+                continue
+            base, cur = baseline[rows][name], current[rows][name]
+            time_change = cur['seconds'] / base['seconds'] - 1 if base['seconds'] else 0.0
+            flags = []
+            if time_change > tolerance and cur['seconds'] - base['seconds'] > min_seconds:
+                flags.append('time')
+            rss_change = 0.0
+            if base.get('peak_rss_mb') and cur.get('peak_rss_mb') is not None:
+                rss_change = cur['peak_rss_mb'] / base['peak_rss_mb'] - 1
+                if rss_change > tolerance and cur['peak_rss_mb'] - base['peak_rss_mb'] > min_mb:
+                    flags.append('rss')
+            if flags:
+                regressions.append((rows, name, flags))
+            print(f"{rows:>10} {name:<36} {base['seconds']:>8.3f} {cur['seconds']:>8.3f} {time_change:>+7.0%} "
+                  f"{base.get('peak_rss_mb') or 0:>8.1f} {cur.get('peak_rss_mb') or 0:>8.1f} {rss_change:>+7.0%}"
+                  f"{'  REGRESSION (' + ', '.join(flags) + ')' if flags else ''}")
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="Run the suite and write a JSON report")
+    run_parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    run_parser.add_argument('--cities', type=int, default=10)
+    run_parser.add_argument('--models', nargs='+', default=MODELS, choices=MODELS)
+    run_parser.add_argument('--max-train-rows', type=int, default=20_000,
+                            help="Rows used for training; prediction and the other stages use all rows")
+    run_parser.add_argument('--repeat', type=int, default=1)
+    run_parser.add_argument('--output', default='benchmark_results.json')
+
+    compare_parser = commands.add_parser('compare', help="Compare a report against a baseline")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative increase")
+    compare_parser.add_argument('--min-seconds', type=float, default=0.05, help="Ignore smaller time increases")
+    compare_parser.add_argument('--min-mb', type=float, default=10.0, help="Ignore smaller memory increases")
+
+    # Internal: one size in this process, printing its results as JSON
+    size_parser = commands.add_parser('_size')
+    size_parser.add_argument('--rows', type=int, required=True)
+    size_parser.add_argument('--cities', type=int, required=True)
+    size_parser.add_argument('--models', nargs='+', required=True)
+    size_parser.add_argument('--max-train-rows', type=int, required=True)
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args.rows, args.cities, args.models, args.max_train_rows, args.repeat, args.output)
+    elif args.command == 'compare':
+        found = compare(args.baseline, args.current, args.tolerance, args.min_seconds, args.min_mb)
+        print(f"\n{len(found)} regression(s)" if found else "\nNo regressions")
+        sys.exit(1 if found else 0)
+    else:
+        print(json.dumps(run_size(args.rows, args.cities, args.models, args.max_train_rows)))
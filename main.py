@@ -2,9 +2,12 @@
 import os
 import sys
 import logging
+import importlib
+import json
+from datetime import datetime
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Configure logging (DEBUG makes every library log at import and request time)
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'))
 logger = logging.getLogger(__name__)
 
 # Try importing required packages
@@ -23,7 +26,31 @@ except ImportError as e:
     print(f"Error importing required packages: {str(e)}")
     sys.exit(1)
 
-def run_app(st, WeatherDataProcessor, WeatherPredictor, WeatherVisualizer, WeatherAPI):
+class LazyClass:
+    """Stands in for a class whose module is imported on first use
+
+    Calling it or reading an attribute imports the module, so heavy
+    dependencies (sklearn, xgboost, plotly) load only when a page needs them.
+    """
+
+    def __init__(self, module, name):
+        self.module = module
+        self.name = name
+        self._cls = None
+
+    def load(self):
+        if self._cls is None:
+            self._cls = getattr(importlib.import_module(self.module), self.name)
+        return self._cls
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+def run_app(st, WeatherDataProcessor, WeatherPredictor, WeatherVisualizer, WeatherAPI, ObservationStore,
+            ModelRegistry):
     # Page configuration
     st.set_page_config(
         page_title="Weather Forecast ML",
@@ -37,15 +64,57 @@ def run_app(st, WeatherDataProcessor, WeatherPredictor, WeatherVisualizer, Weath
         st.info("You can get an API key from: https://openweathermap.org/api")
         return
 
+    # Cached across reruns and sessions: one store, API client and registry per process
+    @st.cache_resource
+    def shared_resources():
+        store = ObservationStore()
+        return store, WeatherAPI(store=store)
+
+    @st.cache_resource
+    def shared_registry():
+        return ModelRegistry()
+
+    # Derived results are keyed by the content hash of the working dataset
+    @st.cache_data(max_entries=16, show_spinner=False)
+    def analysis_figures(data_key, _data):
+        return (
+            WeatherVisualizer.plot_temperature_trend(_data),
+            WeatherVisualizer.plot_correlation_matrix(_data)
+        )
+
+    @st.cache_data(max_entries=16, show_spinner=False)
+    def memory_report(data_key, _data_processor):
+        return _data_processor.memory_report()
+
+    # Session objects are created by the first page that needs them
+    def init_analysis():
+        if 'data_processor' not in st.session_state:
+            st.session_state.data_processor = WeatherDataProcessor(compact=True)
+        if 'visualizer' not in st.session_state:
+            st.session_state.visualizer = WeatherVisualizer()
+
+    def init_training():
+        init_analysis()
+        if 'predictor' not in st.session_state:
+            st.session_state.predictor = WeatherPredictor(n_jobs=-1, registry=shared_registry())
+
+    def load_saved_model(feature_spec):
+        """Start from the newest saved model for the selected feature spec, once per spec"""
+        spec_hash = spec_key(feature_spec)
+        if st.session_state.get('model_spec_hash') == spec_hash:
+            return
+        predictor = st.session_state.predictor
+        if predictor.model_entry is None or predictor.model_entry.get('spec_hash') != spec_hash:
+            # A model for other features cannot be used; fall back to an untrained predictor
+            predictor = st.session_state.predictor = WeatherPredictor(n_jobs=-1, registry=shared_registry())
+            predictor.load_latest(feature_spec=feature_spec)
+        st.session_state.model_spec_hash = spec_hash
+
+    observation_store, weather_api = shared_resources()
+
     # Initialize session state
-    if 'data_processor' not in st.session_state:
-        st.session_state.data_processor = WeatherDataProcessor()
-    if 'predictor' not in st.session_state:
-        st.session_state.predictor = WeatherPredictor()
-    if 'visualizer' not in st.session_state:
-        st.session_state.visualizer = WeatherVisualizer()
-    if 'weather_api' not in st.session_state:
-        st.session_state.weather_api = WeatherAPI()
+    st.session_state.observation_store = observation_store
+    st.session_state.weather_api = weather_api
 
     # Add city selection to session state
     if 'selected_city' not in st.session_state:
@@ -60,7 +129,11 @@ def run_app(st, WeatherDataProcessor, WeatherPredictor, WeatherVisualizer, Weath
 
     # Sidebar
     st.sidebar.title("Navigation")
-    page = st.sidebar.radio("Go to", ["Current Weather", "Data Analysis", "ML Model Training"])
+    pages = ["Current Weather", "Data Analysis", "ML Model Training"]
+    # Hidden unless the app is opened with ?diagnostics=1
+    if st.query_params.get('diagnostics'):
+        pages.append("Diagnostics")
+    page = st.sidebar.radio("Go to", pages)
 
     if page == "Current Weather":
         st.header("🌡️ Current Weather")
@@ -93,6 +166,7 @@ def run_app(st, WeatherDataProcessor, WeatherPredictor, WeatherVisualizer, Weath
                 st.error("Error fetching weather data. Please check the city name and try again.")
 
     elif page == "Data Analysis":
+        init_analysis()
         st.header("📊 Data Analysis")
         
         col1, col2 = st.columns(2)
@@ -102,24 +176,67 @@ def run_app(st, WeatherDataProcessor, WeatherPredictor, WeatherVisualizer, Weath
             if st.button("Generate Sample Data"):
                 st.session_state.data_processor.generate_sample_data()
                 st.success("Sample data generated successfully!")
+            if st.button("Load Stored Observations"):
+                data, message = st.session_state.data_processor.load_from_store(
+                    st.session_state.observation_store
+                )
+                if data is not None:
+                    st.success(message)
+                else:
+                    st.warning(message)
+
+        # Parse each upload once; reruns reuse the parsed dataset and its message
+        if uploaded_file is not None and st.session_state.get('upload_id') != uploaded_file.file_id:
+            # Stream large uploads in chunks with compact dtypes
+            chunksize = 500_000 if uploaded_file.size > 50 * 2**20 else None
+            data, message = st.session_state.data_processor.process_uploaded_data(
+                uploaded_file, chunksize=chunksize
+            )
+            stats = st.session_state.data_processor.ingest_stats if chunksize else None
+            mask = st.session_state.data_processor.missing_mask
+            gaps = None
+            if data is not None and mask is not None:
+                gaps = (int(mask.to_numpy().sum()), int(data[mask.columns].isna().to_numpy().sum()))
+            st.session_state.upload_id = uploaded_file.file_id
+            st.session_state.upload_result = (data is not None, message, stats, gaps)
 
         if uploaded_file is not None:
-            data, message = st.session_state.data_processor.process_uploaded_data(uploaded_file)
-            if data is not None:
+            ok, message, stats, gaps = st.session_state.upload_result
+            if ok:
                 st.success(message)
+                if stats:
+                    st.caption(
+                        f"Ingested {stats['rows']:,} rows at {stats['rows_per_sec']:,.0f} rows/s "
+                        f"({stats['frame_memory_mb']:.1f} MB in memory)"
+                    )
+                if gaps and gaps[0]:
+                    st.caption(
+                        f"Resampled onto a regular grid: {gaps[0]:,} values were not observed at their grid time, "
+                        f"{gaps[0] - gaps[1]:,} were interpolated and {gaps[1]:,} lie in outages too long to fill; "
+                        "rows with an interpolated temperature are not used for training"
+                    )
             else:
                 st.error(message)
 
         if st.session_state.data_processor.data is not None:
+            data_key = st.session_state.data_processor.data_key()
+            report = memory_report(data_key, st.session_state.data_processor)
+            st.caption(
+                f"{report['rows']:,} rows · {report['bytes_per_row']:.1f} bytes/row in memory "
+                f"(default layout: {report['baseline_bytes_per_row']:.1f} bytes/row)"
+            )
             st.subheader("Data Visualization")
             
-            fig1 = st.session_state.visualizer.plot_temperature_trend(st.session_state.data_processor.data)
+            fig1, fig2 = analysis_figures(data_key, st.session_state.data_processor.data)
             st.plotly_chart(fig1, use_container_width=True)
             
-            fig2 = st.session_state.visualizer.plot_correlation_matrix(st.session_state.data_processor.data)
             st.plotly_chart(fig2, use_container_width=True)
 
     elif page == "ML Model Training":
+        from utils.features import BASIC_FEATURE_SPEC, EXTENDED_FEATURE_SPEC, spec_key
+        from utils.forecasting import HorizonForecaster
+
+        init_training()
         st.header("🤖 ML Model Training")
         
         if st.session_state.data_processor.data is not None:
@@ -127,12 +244,36 @@ def run_app(st, WeatherDataProcessor, WeatherPredictor, WeatherVisualizer, Weath
                 "Select Model",
                 ["Linear Regression", "Random Forest", "XGBoost"]
             )
+            use_history = st.checkbox(
+                "Include lag and rolling features",
+                help="Adds previous days' readings, 7/30-day rolling statistics and seasonal encodings"
+            )
+            feature_spec = EXTENDED_FEATURE_SPEC if use_history else BASIC_FEATURE_SPEC
+            load_saved_model(feature_spec)
+            entry = st.session_state.predictor.model_entry
+            if entry is not None:
+                metrics = entry['metrics']
+                online = f", online RMSE {metrics['online_rmse']:.2f}" if 'online_rmse' in metrics else ""
+                st.caption(
+                    f"Current model: {entry['model_name']} saved "
+                    f"{datetime.fromtimestamp(entry['created']).strftime('%Y-%m-%d %H:%M')} "
+                    f"(RMSE {metrics.get('rmse', float('nan')):.2f}{online})"
+                )
+            time_ordered = st.checkbox(
+                "Time-ordered validation",
+                value=True,
+                help="Validate on later dates than the model was trained on instead of a random shuffle"
+            )
             
             if st.button("Train Model"):
-                X, y = st.session_state.data_processor.prepare_ml_data()
+                X, y = st.session_state.data_processor.prepare_ml_data(feature_spec)
                 if X is not None and y is not None:
                     with st.spinner("Training model..."):
-                        results = st.session_state.predictor.train_model(X, y, model_type)
+                        results = st.session_state.predictor.train_model(
+                            X, y, model_type, feature_spec=feature_spec,
+                            split='time' if time_ordered else 'random',
+                            dates=st.session_state.data_processor.ml_dates
+                        )
                         if results:
                             st.success("Model trained successfully!")
                             
@@ -143,6 +284,9 @@ def run_app(st, WeatherDataProcessor, WeatherPredictor, WeatherVisualizer, Weath
                             with col2:
                                 st.metric("CV RMSE (mean)", f"{results['cv_rmse_mean']:.2f}")
                                 st.metric("CV RMSE (std)", f"{results['cv_rmse_std']:.2f}")
+                            st.caption("Training time: " + " · ".join(
+                                f"{phase} {seconds:.2f}s" for phase, seconds in results['timings'].items()
+                            ))
                             
                             if 'feature_importance' in results:
                                 st.subheader("Feature Importance Analysis")
@@ -155,19 +299,147 @@ def run_app(st, WeatherDataProcessor, WeatherPredictor, WeatherVisualizer, Weath
                             fig = st.session_state.visualizer.plot_prediction_results(
                                 results['test_actual'],
                                 results['test_predictions'],
-                                results['test_features'].index
+                                results['test_features'].index,
+                                results['test_lower'],
+                                results['test_upper']
                             )
                             st.plotly_chart(
                                 fig,
                                 use_container_width=True
                             )
+                            predictor = st.session_state.predictor
+                            st.caption(
+                                f"{100 * (1 - predictor.interval_alpha):.0f}% prediction interval: "
+                                f"±{predictor.interval_halfwidth:.2f}°C (split-conformal), "
+                                f"test coverage {100 * results['interval_coverage']:.1f}%"
+                            )
                         else:
                             st.error("Error training the model")
                 else:
                     st.error("Error preparing data for training")
+
+            if st.button("Compare All Models"):
+                X, y = st.session_state.data_processor.prepare_ml_data(feature_spec)
+                if X is not None and y is not None:
+                    with st.spinner("Training all models..."):
+                        leaderboard = st.session_state.predictor.train_all(
+                            X, y, split='time' if time_ordered else 'random'
+                        )
+                        if leaderboard is not None:
+                            st.subheader("Model Leaderboard")
+                            st.dataframe(
+                                leaderboard.style.format({
+                                    'rmse': '{:.3f}',
+                                    'r2': '{:.3f}',
+                                    'cv_rmse_mean': '{:.3f}',
+                                    'cv_rmse_std': '{:.3f}',
+                                    'fit_time': '{:.2f}s',
+                                    'predict_ms_per_1k_rows': '{:.2f}'
+                                }),
+                                use_container_width=True,
+                                hide_index=True
+                            )
+                            st.caption(
+                                f"Wall time {leaderboard.attrs['wall_time']:.2f}s for "
+                                f"{leaderboard.attrs['total_fit_time']:.2f}s of model fitting"
+                            )
+                        else:
+                            st.error("Error training the models")
+                else:
+                    st.error("Error preparing data for training")
+
+            if st.button("Walk-forward Backtest"):
+                X, y = st.session_state.data_processor.prepare_ml_data(feature_spec)
+                if X is not None and y is not None:
+                    with st.spinner("Backtesting..."):
+                        backtest = st.session_state.predictor.backtest(
+                            X, y, st.session_state.data_processor.ml_dates, model_type
+                        )
+                    if backtest is not None:
+                        st.caption(
+                            f"{model_type}: RMSE {backtest['rmse_mean']:.2f} ± {backtest['rmse_std']:.2f} "
+                            f"across {len(backtest['folds'])} expanding-window folds ({backtest['seconds']:.2f}s)"
+                        )
+                        st.dataframe(backtest['folds'], use_container_width=True, hide_index=True)
+                    else:
+                        st.error("Error backtesting the model")
+
+            st.subheader("Multi-step Forecast")
+            col1, col2 = st.columns(2)
+            with col1:
+                horizon = st.slider("Forecast horizon (steps)", 1, 10, 5)
+            with col2:
+                strategy = st.selectbox("Strategy", list(HorizonForecaster.STRATEGIES))
+
+            if st.button("Forecast"):
+                data = st.session_state.data_processor.data
+                try:
+                    with st.spinner("Fitting forecaster and backtesting..."):
+                        forecaster = HorizonForecaster(horizon=horizon, strategy=strategy)
+                        backtest = forecaster.backtest(data)
+                        forecast = forecaster.fit(data).predict(data)
+                    st.dataframe(forecast, use_container_width=True, hide_index=True)
+                    st.caption(
+                        f"Rolling-origin backtest: RMSE {backtest['rmse']:.2f} over "
+                        f"{backtest['origins']:,} origins ({backtest['fits']} refits, {backtest['seconds']:.2f}s)"
+                    )
+                    st.dataframe(backtest['per_horizon'], use_container_width=True, hide_index=True)
+                except ValueError as e:
+                    st.error(f"Error forecasting: {str(e)}")
         else:
             st.info("Please upload data or generate sample data to begin analysis")
 
+    elif page == "Diagnostics":
+        from utils.instrumentation import METRICS
+
+        st.header("🩺 Diagnostics")
+        snapshot = METRICS.snapshot()
+        st.caption(f"Metrics collected by this server process over the last {snapshot['uptime_sec']:,.0f}s")
+
+        def format_labels(labels):
+            return ", ".join(f"{key}={value}" for key, value in labels.items())
+
+        st.subheader("Latency")
+        if snapshot['histograms']:
+            st.dataframe(pd.DataFrame([
+                {
+                    'metric': h['name'],
+                    'labels': format_labels(h['labels']),
+                    'count': h['count'],
+                    'mean_ms': 1000 * h['mean'],
+                    'p50_ms': 1000 * h['p50'],
+                    'p95_ms': 1000 * h['p95'],
+                    'p99_ms': 1000 * h['p99'],
+                    'total_s': h['sum']
+                }
+                for h in snapshot['histograms']
+            ]), use_container_width=True, hide_index=True)
+        else:
+            st.info("No timings recorded yet")
+
+        st.subheader("Counters")
+        if snapshot['counters']:
+            st.dataframe(pd.DataFrame([
+                {'metric': c['name'], 'labels': format_labels(c['labels']), 'value': c['value']}
+                for c in snapshot['counters']
+            ]), use_container_width=True, hide_index=True)
+        st.caption("Weather API cache: " + ", ".join(
+            f"{key} {value:.2f}" if isinstance(value, float) else f"{key} {value}"
+            for key, value in st.session_state.weather_api.cache_stats().items()
+        ))
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.download_button("Download Prometheus metrics", METRICS.to_prometheus(),
+                               file_name="metrics.prom", mime="text/plain")
+        with col2:
+            st.download_button("Download JSON snapshot", json.dumps(snapshot, indent=2),
+                               file_name="metrics.json", mime="application/json")
+        with col3:
+            if st.button("Reset metrics"):
+                METRICS.reset()
+                st.rerun()
+
     # Footer
     st.markdown("---")
     st.markdown("""
@@ -179,14 +451,19 @@ def run_app(st, WeatherDataProcessor, WeatherPredictor, WeatherVisualizer, Weath
 def main():
     try:
         import streamlit as st
-        import pandas as pd
-        from utils.data_processor import WeatherDataProcessor
-        from utils.ml_models import WeatherPredictor
-        from utils.visualizations import WeatherVisualizer
-        from utils.weather_api import WeatherAPI
+        from utils.instrumentation import METRICS
         
-        # Initialize the app
-        run_app(st, WeatherDataProcessor, WeatherPredictor, WeatherVisualizer, WeatherAPI)
+        # Initialize the app; each module is imported by the first page using it
+        with METRICS.timer('app_run_seconds'):
+            run_app(
+                st,
+                LazyClass('utils.data_processor', 'WeatherDataProcessor'),
+                LazyClass('utils.ml_models', 'WeatherPredictor'),
+                LazyClass('utils.visualizations', 'WeatherVisualizer'),
+                LazyClass('utils.weather_api', 'WeatherAPI'),
+                LazyClass('utils.observation_store', 'ObservationStore'),
+                LazyClass('utils.model_registry', 'ModelRegistry')
+            )
     except ImportError as e:
         st.error(f"Error importing required packages: {str(e)}")
         st.info("Please ensure all required packages are installed correctly.")
@@ -0,0 +1,60 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from utils.data_processor import WeatherDataProcessor
+
+CSV = """date,city,temperature,humidity,pressure
+2023-01-01,Austin,1,50,1000
+2023-01-01,,2,51,1001
+2023-01-02,Austin,3,52,1002
+2023-01-02,Boston,4,53,1003
+2023-01-03,Austin,5,54,1004
+2023-01-03,Boston,6,55,1005
+"""
+
+def test_chunked_ingest_matches_single_pass_with_blank_city():
+    full, message = WeatherDataProcessor().process_uploaded_data(io.StringIO(CSV))
+    assert message == "Data processed successfully"
+    chunked, message = WeatherDataProcessor().process_uploaded_data(io.StringIO(CSV), chunksize=2)
+    assert message == "Data processed successfully"
+
+    assert isinstance(chunked['city'].dtype, pd.CategoricalDtype)
+    assert chunked['city'].isna().sum() == full['city'].isna().sum() == 1
+    pd.testing.assert_frame_equal(
+        chunked.astype({'city': object}), full.astype({'city': object}), check_dtype=False
+    )
+    np.testing.assert_allclose(chunked['temperature'], [1, 2, 3, 4, 5, 6])
+
+def test_interpolated_targets_are_not_training_rows():
+    # Austin misses 2023-01-02, which the daily grid fills by interpolation
+    csv = """date,city,temperature,humidity,pressure
+2023-01-01,Austin,1,50,1000
+2023-01-03,Austin,3,52,1002
+2023-01-04,Austin,4,53,1003
+"""
+    processor = WeatherDataProcessor()
+    df, _ = processor.process_uploaded_data(io.StringIO(csv), freq='D')
+    assert len(df) == 4 and processor.missing_mask['temperature'].sum() == 1
+
+    X, y = processor.prepare_ml_data()
+    assert list(y) == [1, 3, 4]
+    assert list(processor.ml_dates.day) == [1, 3, 4]
+    X, y = processor.prepare_ml_data(use_interpolated=True)
+    assert list(y) == [1, 2, 3, 4]
+
+def test_header_only_upload_is_rejected():
+    header = "date,city,temperature,humidity,pressure\n"
+    for chunksize in (None, 10):
+        df, message = WeatherDataProcessor().process_uploaded_data(io.StringIO(header), chunksize=chunksize)
+        assert df is None and message == "Uploaded file contains no rows"
+
+def test_compact_layout_categorizes_stations():
+    df = WeatherDataProcessor().generate_sample_data(n_cities=3).astype({'city': str})
+    compact = WeatherDataProcessor.to_compact(df)
+
+    assert isinstance(compact['city'].dtype, pd.CategoricalDtype)
+    assert (compact.dtypes.drop('city') == 'float32').all()
+    assert isinstance(compact.index, pd.DatetimeIndex)
+    pd.testing.assert_series_equal(compact['city'].astype(str), df['city'].set_axis(compact.index))
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.features import EXTENDED_FEATURE_SPEC, FeaturePipeline, grouped_rolling, row_hashes, spec_key
+
+def weather_frame(n_cities, days):
+    rng = np.random.default_rng(0)
+    dates = pd.date_range('2023-01-01', periods=days, freq='D')
+    df = pd.DataFrame({
+        'date': np.repeat(dates, n_cities),
+        'temperature': rng.normal(20, 5, days * n_cities),
+        'humidity': rng.normal(60, 10, days * n_cities),
+        'pressure': rng.normal(1013, 5, days * n_cities),
+    })
+    if n_cities > 1:
+        df.insert(1, 'city', np.tile([f'City {i}' for i in range(n_cities)], days))
+    return df
+
+@pytest.mark.parametrize('n_cities', [1, 3])
+def test_appended_rows_match_a_full_recompute(n_cities):
+    df = weather_frame(n_cities, 120)
+    pipeline = FeaturePipeline()
+    pipeline.transform(df.iloc[:90 * n_cities], EXTENDED_FEATURE_SPEC)
+
+    extended = pipeline._extend(df, EXTENDED_FEATURE_SPEC, spec_key(EXTENDED_FEATURE_SPEC), row_hashes(df))
+    assert extended is not None
+    expected = FeaturePipeline.compute(df, EXTENDED_FEATURE_SPEC)
+    pd.testing.assert_frame_equal(extended, expected)
+
+def test_rows_that_do_not_extend_the_last_frame_are_recomputed():
+    df = weather_frame(1, 60)
+    pipeline = FeaturePipeline()
+    pipeline.transform(df.iloc[:40], EXTENDED_FEATURE_SPEC)
+    changed = df.copy()
+    changed.loc[10, 'temperature'] += 1
+
+    key = spec_key(EXTENDED_FEATURE_SPEC)
+    assert pipeline._extend(changed, EXTENDED_FEATURE_SPEC, key, row_hashes(changed)) is None
+    pd.testing.assert_frame_equal(
+        pipeline.transform(changed, EXTENDED_FEATURE_SPEC),
+        FeaturePipeline.compute(changed, EXTENDED_FEATURE_SPEC)
+    )
+
+def test_target_features_only_see_past_rows():
+    df = weather_frame(3, 40)
+    features = FeaturePipeline.compute(df, EXTENDED_FEATURE_SPEC)
+    by_city = df.groupby('city')['temperature']
+
+    pd.testing.assert_series_equal(features['temperature_lag_1'], by_city.shift(1), check_names=False)
+    past = by_city.shift(1).groupby(df['city'])
+    pd.testing.assert_series_equal(
+        features['temperature_roll_mean_7'], past.transform(lambda s: s.rolling(7).mean()), check_names=False
+    )
+
+def test_grouped_rolling_matches_pandas():
+    rng = np.random.default_rng(3)
+    values = rng.normal(size=300)
+    codes = rng.integers(0, 4, 300)
+    mean, std = grouped_rolling(values, codes, 5)
+
+    by_group = pd.Series(values).groupby(codes)
+    np.testing.assert_allclose(mean, by_group.transform(lambda s: s.rolling(5).mean()), atol=1e-12)
+    np.testing.assert_allclose(std, by_group.transform(lambda s: s.rolling(5).std()), atol=1e-9)
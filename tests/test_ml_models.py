@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from utils.data_processor import WeatherDataProcessor
+from utils.features import EXTENDED_FEATURE_SPEC
+from utils.ml_models import (
+    BoostedTreesRegressor, FoldEnsemble, IncrementalLinearRegression, WeatherPredictor, conformal_quantile,
+    time_ordered
+)
+from utils.synthetic import SyntheticWeatherGenerator
+
+@pytest.fixture(scope='module')
+def city_data():
+    """Three years of daily readings for three cities, with history features"""
+    processor = WeatherDataProcessor()
+    processor._set_data(SyntheticWeatherGenerator(n_cities=3, years=3, freq='D', gap_rate=0).to_frame())
+    return processor.prepare_ml_data(EXTENDED_FEATURE_SPEC)
+
+@pytest.mark.parametrize('model_name', ['Linear Regression', 'XGBoost'])
+def test_time_split_fold_reuse_matches_refit(city_data, model_name):
+    X, y = city_data
+    refit = WeatherPredictor().train_model(X, y, model_name, split='time')
+    predictor = WeatherPredictor()
+    reused = predictor.train_model(X, y, model_name, split='time', reuse_fold_models=True)
+
+    # The early chronological folds saw little history, so only the last one is served
+    assert not isinstance(predictor.current_model, FoldEnsemble)
+    assert reused['rmse'] <= 1.1 * refit['rmse']
+    assert reused['interval_coverage'] >= 0.85
+
+def test_random_split_fold_reuse_averages_folds(city_data):
+    X, y = city_data
+    predictor = WeatherPredictor()
+    refit = WeatherPredictor().train_model(X, y)
+    reused = predictor.train_model(X, y, reuse_fold_models=True)
+
+    assert isinstance(predictor.current_model, FoldEnsemble)
+    assert reused['rmse'] <= 1.1 * refit['rmse']
+
+def test_boosting_warm_start_continues_from_best_iteration():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(3000, 5))
+    y = 3 * X[:, 0] + np.sin(X[:, 1]) + rng.normal(size=3000)
+    model = BoostedTreesRegressor(n_estimators=500).fit(X, y)
+    best = model.model_.best_iteration + 1
+    assert model.model_.get_booster().num_boosted_rounds() > best
+
+    model.set_params(warm_start=True, n_estimators=10).fit(X[-1000:], y[-1000:])
+    assert model.model_.get_booster().num_boosted_rounds() == best + 10
+
+def test_time_ordered_boosting_stops_on_trailing_rows():
+    # The target drifts over the rows, so only the trailing slice reflects its latest level
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2000, 3))
+    y = X[:, 0] + np.linspace(0, 20, 2000) + rng.normal(size=2000)
+    model = time_ordered(BoostedTreesRegressor())
+    assert model.shuffle is False
+
+    model.fit(X, y)
+    X_val, y_val = X[-200:], y[-200:]
+    evals = model.model_.evals_result()['validation_0']['rmse']
+    rmse = np.sqrt(np.mean((model.model_.predict(X_val) - y_val) ** 2))
+    assert rmse == pytest.approx(min(evals), rel=1e-4)
+
+@pytest.mark.parametrize('model_name', ['Random Forest', 'XGBoost'])
+def test_update_refits_on_recent_rows_without_changing_parameters(city_data, model_name):
+    X, y = city_data
+    history, new = slice(0, len(X) - 60), slice(len(X) - 60, None)
+    predictor = WeatherPredictor()
+    predictor.models['Random Forest'].set_params(n_estimators=20)
+    predictor.train_model(X.iloc[history], y.iloc[history], model_name, dates=np.arange(len(X) - 60))
+    params = predictor.current_model.get_params()
+
+    # The shuffled training rows are kept in time order
+    recent = predictor._recent[0].index
+    assert recent.is_monotonic_increasing
+    assert recent[-1] > X.index[history][-100]
+
+    assert predictor.update(X.iloc[new], y.iloc[new], trees=5) is not None
+    assert predictor.current_model.get_params() == params
+
+@pytest.mark.parametrize('n, alpha', [(19, 0.05), (100, 0.1), (1000, 0.05), (5, 0.05)])
+def test_conformal_quantile_is_the_finite_sample_order_statistic(n, alpha):
+    residuals = np.random.default_rng(n).normal(size=n)
+    rank = min(n, int(np.ceil((n + 1) * (1 - alpha))))
+    assert conformal_quantile(residuals, alpha) == np.sort(np.abs(residuals))[rank - 1]
+
+def test_incremental_linear_regression_matches_sklearn():
+    rng = np.random.default_rng(4)
+    X = rng.normal(50, 10, size=(2000, 4))
+    y = X @ [1.5, -2.0, 0.0, 0.3] + 7 + rng.normal(size=2000)
+    expected = LinearRegression().fit(X, y)
+
+    model = IncrementalLinearRegression()
+    for start in range(0, 2000, 300):
+        model.partial_fit(X[start:start + 300], y[start:start + 300])
+    np.testing.assert_allclose(model.coef_, expected.coef_, rtol=1e-8, atol=1e-9)
+    np.testing.assert_allclose(model.intercept_, expected.intercept_, rtol=1e-8)
+    np.testing.assert_allclose(model.predict(X), expected.predict(X), atol=1e-6)
+
+    # fit() starts over instead of adding to earlier rows
+    refit = model.fit(X[:500], y[:500])
+    np.testing.assert_allclose(refit.coef_, LinearRegression().fit(X[:500], y[:500]).coef_, rtol=1e-8, atol=1e-9)
+
+@pytest.mark.parametrize('split', ['random', 'time'])
+def test_leaderboard_scores_match_train_model(city_data, split):
+    X, y = city_data
+    predictor = WeatherPredictor()
+    leaderboard = predictor.train_all(X, y, ['Linear Regression'], n_jobs=1, split=split).set_index('model')
+    results = predictor.train_model(X, y, 'Linear Regression', split=split)
+
+    assert leaderboard.loc['Linear Regression', 'rmse'] == pytest.approx(results['rmse'])
+    assert leaderboard.loc['Linear Regression', 'cv_rmse_mean'] == pytest.approx(results['cv_rmse_mean'])
@@ -0,0 +1,59 @@
+import glob
+import os
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from utils import model_registry
+from utils.model_registry import ModelRegistry
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(str(tmp_path), keep=2)
+
+@pytest.fixture
+def model():
+    return LinearRegression().fit(np.arange(6.0).reshape(3, 2), [1.0, 2.0, 3.0])
+
+def test_save_keeps_newest_entries_per_name_and_key(registry, model):
+    for rmse in range(4):
+        registry.save(model, 'Linear Regression', ['a', 'b'], metrics={'rmse': rmse})
+    registry.save(model, 'Linear Regression', ['a', 'b'], key='Paris')
+
+    entries = registry.entries()
+    assert [e['metrics'].get('rmse') for e in entries if e['key'] is None] == [3.0, 2.0]
+    assert [e['key'] for e in entries].count('Paris') == 1
+    # Pruned entries lose their model file too
+    assert len(glob.glob(os.path.join(registry.path, '*.joblib'))) == 3
+
+def test_batch_save_prunes_once(registry, model):
+    for _ in range(3):
+        for city in ['Austin', 'Paris']:
+            registry.save(model, 'Linear Regression', ['a', 'b'], key=city, prune=False)
+    assert len(registry.entries()) == 6
+
+    registry.prune_all()
+    assert sorted(e['key'] for e in registry.entries()) == ['Austin', 'Austin', 'Paris', 'Paris']
+
+def test_find_matches_feature_spec(registry, model):
+    spec = {'target': 'temperature', 'lags': {'temperature': [1]}}
+    registry.save(model, 'Linear Regression', ['a', 'b'], feature_spec=spec)
+    registry.save(model, 'Linear Regression', ['a', 'b'])
+
+    assert registry.find(feature_spec=spec)['feature_spec'] == spec
+    assert registry.find(feature_spec={'target': 'humidity'}) is None
+
+def test_loaded_models_are_cached_with_a_bound(registry, model, monkeypatch):
+    monkeypatch.setattr(model_registry, 'MODEL_CACHE_SIZE', 2)
+    monkeypatch.setattr(model_registry, '_MODEL_CACHE', model_registry.OrderedDict())
+    registry.keep = 5
+    entries = [registry.save(model, 'Linear Regression', ['a', 'b']) for _ in range(3)]
+
+    first = registry.load(entries[0])
+    assert registry.load(entries[0]) is first
+    np.testing.assert_allclose(first.coef_, model.coef_)
+    registry.load(entries[1])
+    registry.load(entries[2])
+    assert len(model_registry._MODEL_CACHE) == 2
+    assert registry.load(entries[0]) is not first
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from utils.resampling import resample_to_grid
+
+def test_empty_frame_returns_empty_grid():
+    df = pd.DataFrame({
+        'date': pd.Series(dtype='datetime64[ns]'),
+        'city': pd.Series(dtype='category'),
+        'temperature': pd.Series(dtype='float64'),
+    })
+    frame, mask = resample_to_grid(df, freq='h', group_col='city')
+    assert frame.empty and list(frame.columns) == ['date', 'city', 'temperature']
+    assert mask.empty and list(mask.columns) == ['temperature']
+
+def irregular_frame():
+    """Two cities of hourly readings with dropped hours and a NaN reading"""
+    rng = np.random.default_rng(0)
+    frames = []
+    for city in ['Austin', 'Boston']:
+        dates = pd.date_range('2023-01-01', periods=200, freq='h')
+        keep = rng.random(200) > 0.2
+        keep[[0, -1]] = True
+        frame = pd.DataFrame({
+            'date': dates[keep],
+            'city': city,
+            'temperature': rng.normal(20, 5, keep.sum()),
+            'humidity': rng.normal(60, 10, keep.sum()),
+        })
+        frame.loc[5, 'humidity'] = np.nan
+        frames.append(frame)
+    return pd.concat(frames).sort_values('date', kind='stable').reset_index(drop=True)
+
+def test_matches_pandas_time_interpolation_per_city():
+    df = irregular_frame()
+    frame, mask = resample_to_grid(df, group_col='city')
+
+    assert frame['date'].is_monotonic_increasing
+    for city, group in frame.groupby('city'):
+        observed = df[df['city'] == city].set_index('date')[['temperature', 'humidity']]
+        expected = observed.resample('h').asfreq()
+        exact = expected.notna()
+        # Interpolate each column between its own valid readings, like the grid does
+        expected = expected.apply(lambda s: s.dropna().reindex(expected.index).interpolate(method='time'))
+        result = group.set_index('date')[['temperature', 'humidity']]
+        pd.testing.assert_frame_equal(result, expected, check_freq=False)
+        np.testing.assert_array_equal(mask.loc[group.index, 'temperature'], ~exact['temperature'])
+
+def test_max_gap_leaves_long_outages_missing():
+    dates = pd.to_datetime(['2023-01-01 00:00', '2023-01-01 01:00', '2023-01-01 05:00', '2023-01-01 06:00'])
+    df = pd.DataFrame({'date': dates, 'temperature': [1.0, 2.0, 6.0, 7.0]})
+
+    filled, _ = resample_to_grid(df, freq='h')
+    np.testing.assert_allclose(filled['temperature'], [1, 2, 3, 4, 5, 6, 7])
+    gapped, mask = resample_to_grid(df, freq='h', max_gap='2h')
+    assert gapped['temperature'].isna().tolist() == [False, False, True, True, True, False, False]
+    assert mask['temperature'].tolist() == [False, False, True, True, True, False, False]
+
+def test_regular_series_pass_through_unchanged():
+    df = pd.DataFrame({
+        'date': pd.date_range('2023-01-01 09:00', periods=30, freq='D'),
+        'temperature': np.arange(30.0),
+    })
+    frame, mask = resample_to_grid(df)
+    pd.testing.assert_frame_equal(frame, df)
+    assert not mask['temperature'].any()
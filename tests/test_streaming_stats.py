@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.streaming_stats import (
+    RollingMoments, StreamingMoments, merge_partitions, moments_from_parquet, partition_moments,
+    rolling_moments
+)
+
+COLUMNS = ['temperature', 'humidity', 'pressure']
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    values = rng.normal([20, 60, 1013], [5, 10, 5], size=(1000, 3))
+    values[:, 1] += 0.8 * values[:, 0]
+    df = pd.DataFrame(values, columns=COLUMNS)
+    df.loc[rng.random(1000) < 0.05, 'humidity'] = np.nan
+    df['city'] = rng.choice(['Austin', 'Boston', 'Paris'], 1000)
+    return df
+
+def assert_matches_pandas(moments, df):
+    values = df[COLUMNS]
+    pd.testing.assert_series_equal(moments.means(), values.mean(), check_names=False)
+    pd.testing.assert_series_equal(moments.var(), values.var(), check_names=False)
+    pd.testing.assert_frame_equal(moments.cov(), values.cov())
+    pd.testing.assert_frame_equal(moments.corr(), values.corr())
+
+def test_chunked_moments_match_pandas(frame):
+    chunks = [frame.iloc[i:i + 137] for i in range(0, len(frame), 137)]
+    assert_matches_pandas(StreamingMoments.from_chunks(chunks, COLUMNS), frame)
+
+def test_merged_partitions_match_pandas(frame):
+    # Partial results from two "workers", merged per city and then overall
+    halves = [partition_moments([frame.iloc[:400]], COLUMNS, by='city'),
+              partition_moments([frame.iloc[400:]], COLUMNS, by='city')]
+    merged = merge_partitions(halves)
+    for city, group in frame.groupby('city'):
+        assert_matches_pandas(merged[city], group)
+
+    total = StreamingMoments(COLUMNS)
+    for moments in merged.values():
+        total.merge(moments)
+    assert_matches_pandas(total, frame)
+
+def test_moments_are_stable_for_large_offsets():
+    rng = np.random.default_rng(1)
+    values = 1e9 + rng.normal(size=(5000, 2))
+    df = pd.DataFrame(values, columns=['a', 'b'])
+    chunks = [df.iloc[i:i + 500] for i in range(0, len(df), 500)]
+    moments = StreamingMoments.from_chunks(chunks, ['a', 'b'])
+    np.testing.assert_allclose(moments.var(), df.var(), rtol=1e-6)
+
+def test_parquet_moments_match_pandas(frame, tmp_path):
+    pytest.importorskip('pyarrow')
+    path = tmp_path / 'frame.parquet'
+    frame.to_parquet(path, row_group_size=100)
+    result = moments_from_parquet(str(path), COLUMNS, by='city', n_jobs=1)
+    for city, group in frame.groupby('city'):
+        assert_matches_pandas(result[city], group)
+
+@pytest.mark.parametrize('window', [1, 7, 30])
+def test_rolling_moments_match_pandas(window):
+    rng = np.random.default_rng(2)
+    values = rng.normal(20, 5, 500)
+    values[[50, 51, 300]] = np.nan
+    series = pd.Series(values)
+
+    mean, std = rolling_moments(values, window)
+    np.testing.assert_allclose(mean, series.rolling(window).mean(), rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(std, series.rolling(window).std(), rtol=1e-7, atol=1e-9)
+
+    # The same values streamed in chunks
+    rolling = RollingMoments(window)
+    streamed = [rolling.update(values[i:i + 64]) for i in range(0, len(values), 64)]
+    np.testing.assert_allclose(np.concatenate([m for m, _ in streamed]), mean, equal_nan=True)
+    np.testing.assert_allclose(np.concatenate([s for _, s in streamed]), std, equal_nan=True)
@@ -0,0 +1,16 @@
+import numpy as np
+
+from utils.data_processor import WeatherDataProcessor
+from utils.visualizations import WeatherVisualizer
+
+def test_trend_band_is_computed_within_each_city():
+    # Cities interleaved by date, as uploads and the observation store produce them
+    df = WeatherDataProcessor().generate_sample_data(n_cities=3).sort_values('date', kind='stable')
+    df = df.reset_index(drop=True)
+    fig = WeatherVisualizer.plot_temperature_trend(df)
+
+    by_city = df.groupby('city', observed=True)['temperature']
+    mean = by_city.transform(lambda s: s.rolling(7).mean())
+    std = by_city.transform(lambda s: s.rolling(7).std())
+    np.testing.assert_allclose(fig.data[1].y, mean + 2 * std)
+    np.testing.assert_allclose(fig.data[2].y, mean - 2 * std)
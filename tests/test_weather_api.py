@@ -0,0 +1,160 @@
+import json
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from utils.observation_store import ObservationStore
+from utils.weather_api import RateLimiter, WeatherAPI
+
+CURRENT = {
+    'dt': 1_700_000_000,
+    'main': {'temp': 20.3, 'feels_like': 19.0, 'humidity': 50, 'pressure': 1012},
+    'weather': [{'description': 'clear sky', 'icon': '01d'}],
+    'wind': {'speed': 3.0},
+}
+
+FORECAST = {
+    'city': {'timezone': 0},
+    'list': [
+        {
+            'dt': 1_700_000_000 + i * 10800,
+            'main': {'temp': 10 + i, 'feels_like': 9, 'humidity': 60, 'pressure': 1010},
+            'weather': [{'description': 'clear sky', 'icon': '01d'}],
+            'wind': {'speed': 2.0},
+        }
+        for i in range(8)
+    ],
+}
+
+class StubHandler(BaseHTTPRequestHandler):
+    """OpenWeatherMap stand-in: 404 for unknown cities, a short delay per request"""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            url = urlparse(self.path)
+            city = parse_qs(url.query)['q'][0].split(',')[0]
+            time.sleep(server.delay)
+            if city.lower().startswith('nowhere'):
+                status, payload = 404, {'cod': '404', 'message': 'city not found'}
+            else:
+                status, payload = 200, CURRENT if url.path.endswith('/weather') else FORECAST
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = server.in_flight = server.max_in_flight = 0
+    server.delay = 0.05
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def make_api(stub, **kwargs):
+    api = WeatherAPI(max_retries=0, **kwargs)
+    api.base_url = f"http://127.0.0.1:{stub.server_address[1]}/data/2.5"
+    return api
+
+def test_many_collects_per_city_errors(stub):
+    api = make_api(stub)
+    batch = api.get_current_weather_many(['Austin', 'Nowhere', ('Paris', 'FR')])
+
+    assert batch['requested'] == 3
+    assert batch['succeeded'] == 2
+    assert set(batch['results']) == {('Austin', 'US'), ('Paris', 'FR')}
+    assert batch['results'][('Austin', 'US')]['temperature'] == 20.3
+    assert batch['results'][('Austin', 'US')]['timestamp'] == datetime.fromtimestamp(CURRENT['dt']).strftime(
+        "%Y-%m-%d %H:%M:%S"
+    )
+    assert list(batch['errors']) == [('Nowhere', 'US')]
+    assert batch['errors'][('Nowhere', 'US')].startswith('HTTP 404')
+
+def test_forecast_many(stub):
+    api = make_api(stub)
+    batch = api.get_forecast_many(['Austin', 'Nowhere'])
+
+    assert batch['succeeded'] == 1
+    assert len(batch['results'][('Austin', 'US')]) > 0
+    assert ('Nowhere', 'US') in batch['errors']
+
+def test_repeated_lookups_are_served_from_cache(stub):
+    api = make_api(stub)
+    api.get_current_weather_many(['Austin', 'Boston'])
+    assert stub.requests == 2
+
+    batch = api.get_current_weather_many(['Austin', 'boston '])
+    assert batch['succeeded'] == 2
+    assert stub.requests == 2
+    assert api.cache_stats()['hits'] == 2
+
+def test_only_fetched_readings_are_stored_under_one_city_name(stub, tmp_path, monkeypatch):
+    store = ObservationStore(str(tmp_path / 'observations.db'))
+    api = make_api(stub, store=store)
+    appended = []
+    original = store.append_reading
+    monkeypatch.setattr(store, 'append_reading', lambda city, data: appended.append(city) or original(city, data))
+
+    api.get_current_weather('san francisco')
+    api.get_current_weather('San Francisco ')
+    api.get_current_weather_many(['SAN FRANCISCO', 'Boston'])
+
+    # Cache hits are not written again
+    assert stub.requests == 2
+    assert appended == ['San Francisco', 'Boston']
+    assert store.cities() == ['Boston', 'San Francisco']
+
+def test_concurrency_is_bounded_by_max_workers(stub):
+    api = make_api(stub)
+    cities = [f'City {i}' for i in range(12)]
+    start = time.perf_counter()
+    batch = api.get_current_weather_many(cities, max_workers=3)
+    elapsed = time.perf_counter() - start
+
+    assert batch['succeeded'] == 12
+    assert 1 < stub.max_in_flight <= 3
+    # 12 requests of 50 ms on 3 workers take at least 4 rounds
+    assert elapsed >= 4 * stub.delay * 0.9
+
+def test_rate_limit_spaces_out_requests(stub):
+    stub.delay = 0
+    api = make_api(stub, rate_limit=20)
+    start = time.perf_counter()
+    batch = api.get_current_weather_many([f'City {i}' for i in range(30)])
+    elapsed = time.perf_counter() - start
+
+    assert batch['succeeded'] == 30
+    # A burst of 20, then 10 more at 20 per second
+    assert elapsed >= 0.45
+
+def test_rate_limiter_allows_burst_then_waits():
+    limiter = RateLimiter(rate=50, burst=5)
+    start = time.perf_counter()
+    for _ in range(5):
+        limiter.acquire()
+    assert time.perf_counter() - start < 0.05
+    for _ in range(5):
+        limiter.acquire()
+    assert time.perf_counter() - start >= 0.08
@@ -0,0 +1,145 @@
+import time
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.model_selection import TimeSeriesSplit
+
+from utils.ml_models import BoostedTreesRegressor, IncrementalLinearRegression, time_ordered
+
+def time_series_folds(dates, n_splits=5, mode='expanding', window=None, test_size=None, gap=0):
+    """Chronological train/test folds over the unique dates of a (multi-city) frame
+
+    Fold boundaries are placed on unique dates, so every city shares them and
+    no row of a test period is ever used for training. In 'expanding' mode the
+    training set grows from the first date; in 'sliding' mode it covers the
+    last `window` dates before each test period. `gap` dates are skipped between
+    train and test. Returns a list of (train_idx, test_idx) row index arrays.
+    """
+    if mode not in ('expanding', 'sliding'):
+        raise ValueError("mode must be 'expanding' or 'sliding'")
+    dates = pd.DatetimeIndex(dates)
+    unique_dates, codes = np.unique(dates.to_numpy(), return_inverse=True)
+    if mode == 'sliding' and window is None:
+        window = len(unique_dates) // (n_splits + 1)
+    splitter = TimeSeriesSplit(
+        n_splits=n_splits,
+        max_train_size=window if mode == 'sliding' else None,
+        test_size=test_size,
+        gap=gap
+    )
+
+    # Sort rows by date once; each fold is then a contiguous slice of that order
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(unique_dates) + 1))
+    folds = []
+    for train_dates, test_dates in splitter.split(unique_dates):
+        train = order[bounds[train_dates[0]]:bounds[train_dates[-1] + 1]]
+        test = order[bounds[test_dates[0]]:bounds[test_dates[-1] + 1]]
+        folds.append((train, test))
+    return folds
+
+def fold_metrics(y_true, y_pred, fold_ids, n_folds):
+    """RMSE, MAE, R² and bias for every fold at once from concatenated predictions"""
+    errors = y_pred - y_true
+    counts = np.bincount(fold_ids, minlength=n_folds)
+    safe = np.maximum(counts, 1)
+    sse = np.bincount(fold_ids, weights=errors ** 2, minlength=n_folds)
+    sae = np.bincount(fold_ids, weights=np.abs(errors), minlength=n_folds)
+    bias = np.bincount(fold_ids, weights=errors, minlength=n_folds) / safe
+    mean_y = np.bincount(fold_ids, weights=y_true, minlength=n_folds) / safe
+    sst = np.bincount(fold_ids, weights=(y_true - mean_y[fold_ids]) ** 2, minlength=n_folds)
+    return pd.DataFrame({
+        'fold': np.arange(n_folds),
+        'rows': counts,
+        'rmse': np.sqrt(sse / safe),
+        'mae': sae / safe,
+        'r2': 1 - sse / np.where(sst > 0, sst, np.nan),
+        'bias': bias
+    })
+
+class Backtester:
+    """Walk-forward evaluation of a regressor over chronological folds
+
+    With `incremental` (the default), expanding-window folds avoid refitting
+    from zero where the model allows it:
+
+    - LinearRegression is replaced by IncrementalLinearRegression, which only
+      folds each fold's newly added rows into its sufficient statistics.
+    - RandomForestRegressor uses `warm_start`, adding `trees_per_fold` trees
+      trained on the expanded window while keeping the earlier ones.
+    - BoostedTreesRegressor continues boosting from the previous booster.
+
+    Other models, and all sliding-window folds, are cloned and refit. Fold
+    predictions are concatenated and scored in a single vectorized pass.
+    """
+
+    def __init__(self, model, n_splits=5, mode='expanding', window=None, test_size=None, gap=0,
+                 incremental=True, trees_per_fold=None):
+        self.model = model
+        self.n_splits = n_splits
+        self.mode = mode
+        self.window = window
+        self.test_size = test_size
+        self.gap = gap
+        self.incremental = incremental
+        self.trees_per_fold = trees_per_fold
+
+    def _trees_per_fold(self):
+        return self.trees_per_fold or max(1, self.model.n_estimators // self.n_splits)
+
+    def _incremental_model(self):
+        """Return a warm-startable copy of the model, or None if it must be refit each fold"""
+        if not self.incremental or self.mode != 'expanding':
+            return None
+        if isinstance(self.model, (LinearRegression, IncrementalLinearRegression)):
+            return IncrementalLinearRegression()
+        if isinstance(self.model, (RandomForestRegressor, BoostedTreesRegressor)):
+            return time_ordered(self.model).set_params(warm_start=True, n_estimators=self._trees_per_fold())
+        return None
+
+    def run(self, X, y, dates):
+        """Evaluate the model on every fold and return per-fold metrics and timings"""
+        start = time.perf_counter()
+        X_values = np.asarray(X, dtype='float64')
+        y_values = np.asarray(y, dtype='float64')
+        folds = time_series_folds(dates, self.n_splits, self.mode, self.window, self.test_size, self.gap)
+
+        model = self._incremental_model()
+        incremental = model is not None
+        seen = 0
+        predictions, actuals, fold_ids, fit_times = [], [], [], []
+        for i, (train, test) in enumerate(folds):
+            fit_start = time.perf_counter()
+            if not incremental:
+                model = time_ordered(self.model).fit(X_values[train], y_values[train])
+            elif isinstance(model, IncrementalLinearRegression):
+                # Expanding folds share their prefix; only the new rows are added
+                model.partial_fit(X_values[train[seen:]], y_values[train[seen:]])
+                seen = len(train)
+            elif isinstance(model, RandomForestRegressor):
+                # n_estimators is the forest size, so grow it to add this fold's trees
+                if i > 0:
+                    model.set_params(n_estimators=model.n_estimators + self._trees_per_fold())
+                model.fit(X_values[train], y_values[train])
+            else:
+                # Boosting adds n_estimators rounds on top of the previous booster
+                model.fit(X_values[train], y_values[train])
+            fit_times.append(time.perf_counter() - fit_start)
+
+            predictions.append(model.predict(X_values[test]))
+            actuals.append(y_values[test])
+            fold_ids.append(np.full(len(test), i))
+
+        metrics = fold_metrics(
+            np.concatenate(actuals), np.concatenate(predictions), np.concatenate(fold_ids), len(folds)
+        )
+        metrics['train_rows'] = [len(train) for train, _ in folds]
+        metrics['fit_time'] = fit_times
+        return {
+            'folds': metrics,
+            'rmse_mean': float(metrics['rmse'].mean()),
+            'rmse_std': float(metrics['rmse'].std(ddof=0)),
+            'incremental': incremental,
+            'seconds': time.perf_counter() - start
+        }
@@ -0,0 +1,75 @@
+import threading
+import time
+from collections import OrderedDict
+
+from utils.instrumentation import METRICS
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed time-to-live
+
+    A named cache also counts its hits and misses in the process-wide metrics
+    (`cache_requests_total{cache=name}`).
+    """
+
+    def __init__(self, maxsize=256, ttl=600, name=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing or expired"""
+        hit = False
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    hit = True
+                else:
+                    del self._data[key]
+            if not hit:
+                self.misses += 1
+                value = default
+        if self.name is not None:
+            METRICS.inc('cache_requests_total', cache=self.name, result='hit' if hit else 'miss')
+        return value
+
+    def set(self, key, value):
+        """Store value under key, evicting the least recently used entries"""
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries and reset the hit/miss counters"""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl
+            }
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
@@ -1,68 +1,297 @@
+import sys
+import time
+import tracemalloc
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from pandas.api.types import union_categoricals
+
+from utils.features import BASIC_FEATURE_SPEC, FeaturePipeline, content_hash, date_values
+from utils.instrumentation import METRICS
+from utils.resampling import resample_to_grid
+
+REQUIRED_COLUMNS = ['date', 'temperature', 'humidity', 'pressure']
+# Measurement columns read as float32 by the chunked ingest path
+FLOAT_COLUMNS = ['temperature', 'humidity', 'pressure', 'feels_like', 'wind_speed']
+# Columns identifying the station/city of a row, stored as categoricals
+STATION_COLUMNS = ['city', 'station', 'station_id']
+# Uploaded series are not interpolated across outages longer than this
+DEFAULT_MAX_GAP = '3D'
+
+def peak_rss_mb():
+    """Return the peak resident set size of this process in MB, if available
+
+    Reads the kernel's high-water mark on Linux, which `/proc/self/clear_refs`
+    can reset, and falls back to `ru_maxrss` elsewhere.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 2**10
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
 
 class WeatherDataProcessor:
-    def __init__(self):
+    def __init__(self, compact=False):
         self.data = None
+        self.ingest_stats = None
+        self.compact = compact
+        self.feature_pipeline = FeaturePipeline()
+        self.ml_dates = None
+        self.missing_mask = None
+        self._data_key = None
+
+    def _set_data(self, df, missing_mask=None):
+        """Store a processed frame as the working dataset, compacting it if enabled"""
+        if self.compact:
+            df = self.to_compact(df)
+        if missing_mask is not None:
+            missing_mask.index = df.index
+        self.data = df
+        self.missing_mask = missing_mask
+        self._data_key = None
+        return df
+
+    @staticmethod
+    def regularize(df, freq=None, max_gap=DEFAULT_MAX_GAP):
+        """Resample each station's series onto a regular grid (see `resample_to_grid`)"""
+        group_col = next((col for col in STATION_COLUMNS if col in df.columns), None)
+        return resample_to_grid(df, freq=freq, max_gap=max_gap, group_col=group_col)
+
+    def data_key(self):
+        """Content hash of the working dataset, computed once per dataset (for caching derived results)"""
+        if self.data is None:
+            return None
+        if self._data_key is None:
+            self._data_key = content_hash(self.data)
+        return self._data_key
+
+    @staticmethod
+    def to_compact(df):
+        """Downcast measurements to float32, store station IDs as categoricals and move dates into a DatetimeIndex"""
+        floats = df.select_dtypes(include='float64').columns
+        dtypes = {col: 'float32' for col in floats}
+        dtypes.update({
+            col: 'category' for col in STATION_COLUMNS
+            if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype)
+        })
+        df = df.astype(dtypes, copy=False)
+        if 'date' in df.columns:
+            df = df.drop(columns='date').set_index(pd.DatetimeIndex(df['date'], name='date'))
+        return df
+
+    def memory_report(self):
+        """Compare memory per row of the working dataset against the default float64 layout"""
+        if self.data is None:
+            return None
+        df = self.data
+        rows = max(len(df), 1)
+        used = int(df.memory_usage(index=True, deep=True).sum())
+        # Default layout: float64 measurements, a datetime64 'date' column, object station IDs
+        # and a RangeIndex
+        numeric = df.select_dtypes(include='number').columns
+        other = df.select_dtypes(exclude=['number', 'datetime']).astype(object)
+        baseline = (len(df) * 8 * (len(numeric) + 1)
+                    + int(other.memory_usage(index=False, deep=True).sum())
+                    + pd.RangeIndex(len(df)).memory_usage())
+        return {
+            'rows': len(df),
+            'bytes': used,
+            'bytes_per_row': used / rows,
+            'baseline_bytes_per_row': baseline / rows,
+            'savings_pct': 100 * (1 - used / baseline) if baseline else 0.0
+        }
+
+    @METRICS.timed('ingest_seconds')
+    def process_uploaded_data(self, file, chunksize=None, date_format='ISO8601', track_memory=False,
+                              freq=None, max_gap=DEFAULT_MAX_GAP):
+        """Process uploaded CSV file containing weather data
+
+        Observations are resampled onto a regular grid per station with
+        time-weighted interpolation, leaving outages longer than `max_gap`
+        missing; `freq` defaults to the most common observation spacing.
+        Each station's grid starts at its first observation, so regular series
+        keep their timestamps and values; grid points without an observed
+        reading are flagged in `missing_mask`.
+        With `chunksize`, the file is parsed in chunks with compact dtypes
+        instead of in one pass (see `_ingest_chunked`).
+        """
+        if chunksize:
+            return self._ingest_chunked(file, chunksize, date_format, track_memory, freq, max_gap)
 
-    def process_uploaded_data(self, file):
-        """Process uploaded CSV file containing weather data"""
         try:
             df = pd.read_csv(file)
-            required_columns = ['date', 'temperature', 'humidity', 'pressure']
             
             # Ensure required columns exist
-            if not all(col in df.columns for col in required_columns):
+            if not all(col in df.columns for col in REQUIRED_COLUMNS):
                 return None, "Missing required columns"
 
+            if df.empty:
+                return None, "Uploaded file contains no rows"
+
             # Convert date to datetime
             df['date'] = pd.to_datetime(df['date'])
             
-            # Sort by date
-            df = df.sort_values('date')
-            
-            # Handle missing values
-            df = df.interpolate(method='linear')
+            # Align each station onto a regular grid and fill short gaps
+            df, missing_mask = self.regularize(df, freq, max_gap)
             
-            self.data = df
+            df = self._set_data(df, missing_mask)
+            return df, "Data processed successfully"
+        except Exception as e:
+            return None, f"Error processing file: {str(e)}"
+
+    def _ingest_chunked(self, file, chunksize, date_format, track_memory=False, freq=None, max_gap=DEFAULT_MAX_GAP):
+        """Parse a large CSV in chunks with explicit dtypes and report ingest stats
+
+        Only parsing is chunked: the float32/categorical chunks are concatenated
+        and resampled as one frame, so peak memory is bounded by the compact
+        size of the whole file (plus one chunk of parser overhead), not by the
+        chunk size. Peak traced allocations are only measured with
+        `track_memory`, since tracemalloc slows parsing down noticeably; peak
+        process RSS is always reported.
+        """
+        tracing = track_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            # Validate the header before reading any data rows
+            header = pd.read_csv(file, nrows=0).columns
+            missing = [col for col in REQUIRED_COLUMNS if col not in header]
+            if missing:
+                return None, "Missing required columns"
+            if hasattr(file, 'seek'):
+                file.seek(0)
+
+            dtypes = {col: 'float32' for col in header if col in FLOAT_COLUMNS}
+            dtypes.update({col: 'category' for col in header if col in STATION_COLUMNS})
+
+            chunks = []
+            for chunk in pd.read_csv(file, chunksize=chunksize, dtype=dtypes):
+                chunk['date'] = pd.to_datetime(chunk['date'], format=date_format)
+                chunks.append(chunk)
+
+            if not sum(len(chunk) for chunk in chunks):
+                return None, "Uploaded file contains no rows"
+
+            # Categories differ between chunks, so union them before concatenating
+            categorical = [col for col in header if col in STATION_COLUMNS]
+            merged = {
+                col: union_categoricals([chunk[col] for chunk in chunks])
+                for col in categorical
+            }
+            df = pd.concat(
+                [chunk.drop(columns=categorical) for chunk in chunks],
+                ignore_index=True
+            )
+            del chunks
+            for col in categorical:
+                df[col] = merged.pop(col)
+            df = df[list(header)]
+
+            # Align each station onto a regular grid (sorting by date) and fill short gaps
+            input_rows = len(df)
+            df, missing_mask = self.regularize(df, freq, max_gap)
+
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] if tracing else None
+            self.ingest_stats = {
+                'rows': len(df),
+                'chunks': -(-input_rows // chunksize),
+                'seconds': elapsed,
+                'rows_per_sec': input_rows / elapsed if elapsed > 0 else float('inf'),
+                'peak_memory_mb': peak / 2**20 if peak is not None else None,
+                'peak_rss_mb': peak_rss_mb(),
+                'frame_memory_mb': float(df.memory_usage(deep=True).sum()) / 2**20
+            }
+
+            df = self._set_data(df, missing_mask)
             return df, "Data processed successfully"
         except Exception as e:
             return None, f"Error processing file: {str(e)}"
+        finally:
+            if tracing:
+                tracemalloc.stop()
+
+    def generate_sample_data(self, n_cities=1, periods=None, freq='D'):
+        """Generate sample weather data for demonstration
 
-    def generate_sample_data(self):
-        """Generate sample weather data for demonstration"""
-        dates = pd.date_range(start='2023-01-01', end='2023-12-31', freq='D')
+        Defaults to one year of daily rows for a single series. `periods` rows
+        at `freq` per city and `n_cities` > 1 (which adds a categorical 'city'
+        column) scale it up, e.g. for benchmarks.
+        """
+        if periods is None:
+            dates = pd.date_range(start='2023-01-01', end='2023-12-31', freq=freq)
+        else:
+            dates = pd.date_range(start='2023-01-01', periods=periods, freq=freq)
+        rows = len(dates) * n_cities
         
         # Generate synthetic weather data
         np.random.seed(42)
-        temperature = np.random.normal(25, 5, len(dates))
-        humidity = np.random.normal(60, 10, len(dates))
-        pressure = np.random.normal(1013, 5, len(dates))
+        temperature = np.random.normal(25, 5, rows)
+        humidity = np.random.normal(60, 10, rows)
+        pressure = np.random.normal(1013, 5, rows)
         
         df = pd.DataFrame({
-            'date': dates,
+            'date': np.tile(dates, n_cities),
             'temperature': temperature,
             'humidity': humidity,
             'pressure': pressure
         })
+        if n_cities > 1:
+            codes = np.repeat(np.arange(n_cities), len(dates))
+            df.insert(1, 'city', pd.Categorical.from_codes(codes, [f'City {i + 1}' for i in range(n_cities)]))
         
-        self.data = df
-        return df
+        return self._set_data(df)
+
+    def load_from_store(self, store, cities=None, start=None, end=None, columns=None):
+        """Load stored observations for a city/date range as the working dataset"""
+        try:
+            df = store.load(cities=cities, start=start, end=end, columns=columns)
+            if df.empty:
+                return None, "No stored observations match the selection"
+            
+            df = self._set_data(df)
+            return df, f"Loaded {len(df)} stored observations"
+        except Exception as e:
+            return None, f"Error loading stored observations: {str(e)}"
 
-    def prepare_ml_data(self):
-        """Prepare data for ML model"""
+    @METRICS.timed('prepare_ml_data_seconds')
+    def prepare_ml_data(self, feature_spec=None, use_interpolated=False):
+        """Prepare data for ML model
+
+        Features are built by the memoized feature pipeline from `feature_spec`
+        (defaults to the basic same-day features). Rows without a full feature
+        history, e.g. the first days when lags are requested, are dropped, and
+        so are rows whose target was interpolated onto the grid rather than
+        observed (see `missing_mask`) unless `use_interpolated` is set, so
+        interpolated values are never used as labels or scored as test targets.
+        The dates of the kept rows are stored in `ml_dates` for time-aware validation.
+        """
         if self.data is None:
             return None, None
             
-        df = self.data.copy()
-        
-        # Create features
-        df['day_of_year'] = df['date'].dt.dayofyear
-        df['month'] = df['date'].dt.month
+        spec = feature_spec or BASIC_FEATURE_SPEC
+        features = self.feature_pipeline.transform(self.data, spec)
         
         # Prepare X (features) and y (target)
-        X = df[['day_of_year', 'month', 'humidity', 'pressure']]
-        y = df['temperature']
+        target = spec['target']
+        complete = features.notna().all(axis=1).to_numpy()
+        if not use_interpolated and self.missing_mask is not None and target in self.missing_mask:
+            complete &= ~self.missing_mask[target].to_numpy()
+        features = features[complete]
+        self.ml_dates = pd.DatetimeIndex(date_values(self.data)[complete])
+        X = features.drop(columns=target)
+        y = features[target]
         
         return X, y
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import numpy as np
+import pandas as pd
+
+from utils.cache import TTLCache
+from utils.streaming_stats import rolling_moments
+
+# The original same-row feature set used by prepare_ml_data
+BASIC_FEATURE_SPEC = {
+    'target': 'temperature',
+    'calendar': ['day_of_year', 'month'],
+    'passthrough': ['humidity', 'pressure'],
+}
+
+# Adds history: lags, trailing rolling statistics, cyclical dates and differences
+EXTENDED_FEATURE_SPEC = {
+    'target': 'temperature',
+    'calendar': ['day_of_year', 'month'],
+    'cyclical': ['day_of_year'],
+    'passthrough': ['humidity', 'pressure'],
+    'lags': {'temperature': [1, 2, 7], 'humidity': [1], 'pressure': [1]},
+    'rolling': {'temperature': [7, 30]},
+    'diffs': {'pressure': [1]},
+}
+
+# Period of each calendar field for sin/cos encoding
+CYCLE_PERIODS = {'day_of_year': 365.25, 'month': 12, 'day_of_week': 7, 'hour': 24}
+
+def date_values(df):
+    """Return the dates of a weather frame, whether stored as a column or as the index"""
+    if 'date' in df.columns:
+        return df['date']
+    return df.index.to_series(index=df.index)
+
+def grouped_rolling(values, codes, size):
+    """Trailing rolling mean and std within groups, computed in one pass over all rows
+
+    Rows are stably sorted by group so each group is contiguous, rolled as a
+    single series, and windows reaching back into a previous group are masked.
+    """
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(sorted_codes)) + 1]
+    lengths = np.diff(np.r_[starts, len(sorted_codes)])
+    position = np.arange(len(sorted_codes)) - np.repeat(starts, lengths)
+
+    mean, std = rolling_moments(values[order], size)
+    valid = position >= size - 1
+    mean = np.where(valid, mean, np.nan)
+    std = np.where(valid, std, np.nan)
+
+    result_mean = np.empty_like(mean)
+    result_std = np.empty_like(std)
+    result_mean[order] = mean
+    result_std[order] = std
+    return result_mean, result_std
+
+def spec_key(spec):
+    """Return a stable hash of a feature spec"""
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+def row_hashes(df):
+    """Return one 64-bit content hash per row, including the index"""
+    return pd.util.hash_pandas_object(df, index=True).to_numpy()
+
+def content_hash(*objects):
+    """Return a hex digest of the contents of one or more frames/series"""
+    digest = hashlib.sha1()
+    for obj in objects:
+        digest.update(row_hashes(obj).tobytes())
+    return digest.hexdigest()
+
+class FeaturePipeline:
+    """Builds feature matrices from a declarative spec, memoized by data and spec hash
+
+    Features derived from the target column only see past rows (lags start
+    at 1, rolling windows and differences are computed on the shifted series),
+    so no feature leaks the value being predicted. When a frame extends the
+    previously transformed one, only the appended tail is recomputed.
+    """
+
+    def __init__(self, cache_size=8, cache_ttl=3600):
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl, name='features')
+        self._last = {}
+
+    @staticmethod
+    def lookback(spec):
+        """Number of trailing rows a feature at row t depends on"""
+        target = spec.get('target')
+        windows = [0]
+        for col, lags in spec.get('lags', {}).items():
+            windows.extend(lags)
+        for col, sizes in spec.get('rolling', {}).items():
+            windows.extend(size + (col == target) for size in sizes)
+        for col, periods in spec.get('diffs', {}).items():
+            windows.extend(p + (col == target) for p in periods)
+        return max(windows)
+
+    @staticmethod
+    def _group_keys(df):
+        return df['city'] if 'city' in df.columns else None
+
+    @staticmethod
+    def compute(df, spec):
+        """Compute the feature frame for df without any caching"""
+        dates = date_values(df)
+        target = spec.get('target')
+        groups = FeaturePipeline._group_keys(df)
+        features = {}
+
+        calendar = {
+            'day_of_year': lambda: dates.dt.dayofyear,
+            'month': lambda: dates.dt.month,
+            'day_of_week': lambda: dates.dt.dayofweek,
+            'hour': lambda: dates.dt.hour,
+        }
+        for name in spec.get('calendar', []):
+            features[name] = calendar[name]()
+        for name in spec.get('cyclical', []):
+            values = features[name] if name in features else calendar[name]()
+            angle = 2 * np.pi * values.to_numpy(dtype='float64') / CYCLE_PERIODS[name]
+            features[f'{name}_sin'] = np.sin(angle)
+            features[f'{name}_cos'] = np.cos(angle)
+        for col in spec.get('passthrough', []):
+            features[col] = df[col]
+
+        def shifted(col, periods):
+            series = df[col]
+            if groups is None:
+                return series.shift(periods)
+            return series.groupby(groups, observed=True, sort=False).shift(periods)
+
+        for col, lags in spec.get('lags', {}).items():
+            for lag in lags:
+                features[f'{col}_lag_{lag}'] = shifted(col, lag)
+
+        for col, sizes in spec.get('rolling', {}).items():
+            base = shifted(col, 1) if col == target else df[col]
+            for size in sizes:
+                if groups is None:
+                    window = base.rolling(size, min_periods=size)
+                    mean, std = window.mean(), window.std()
+                else:
+                    codes = pd.factorize(groups)[0]
+                    mean, std = grouped_rolling(base.to_numpy(dtype='float64'), codes, size)
+                features[f'{col}_roll_mean_{size}'] = mean
+                features[f'{col}_roll_std_{size}'] = std
+
+        for col, periods in spec.get('diffs', {}).items():
+            for p in periods:
+                if col == target:
+                    # Difference between the two most recent past values
+                    features[f'{col}_diff_{p}'] = shifted(col, 1) - shifted(col, 1 + p)
+                else:
+                    features[f'{col}_diff_{p}'] = df[col] - shifted(col, p)
+
+        frame = pd.DataFrame(features, index=df.index, copy=False)
+        if target is not None:
+            frame[target] = df[target]
+        return frame
+
+    def transform(self, df, spec):
+        """Return the memoized feature frame for df and spec"""
+        hashes = row_hashes(df)
+        skey = spec_key(spec)
+        key = (hashlib.sha1(hashes.tobytes()).hexdigest(), skey)
+        frame = self.cache.get(key)
+        if frame is not None:
+            return frame
+
+        frame = self._extend(df, spec, skey, hashes)
+        if frame is None:
+            frame = self.compute(df, spec)
+
+        self.cache.set(key, frame)
+        self._last[skey] = (hashes, frame)
+        return frame
+
+    def _extend(self, df, spec, skey, hashes):
+        """Recompute only the appended tail if df extends the last transformed frame"""
+        last = self._last.get(skey)
+        if last is None:
+            return None
+        prev_hashes, prev_frame = last
+        n = len(prev_hashes)
+        if n == 0 or n >= len(hashes) or not np.array_equal(hashes[:n], prev_hashes):
+            return None
+
+        # Recompute over the new rows plus enough history for lags and windows
+        lookback = self.lookback(spec)
+        groups = self._group_keys(df)
+        if groups is None:
+            context = df.iloc[max(0, n - lookback):]
+        else:
+            head = df.iloc[:n]
+            history = head.groupby(self._group_keys(head), observed=True, sort=False).tail(lookback)
+            context = pd.concat([history, df.iloc[n:]])
+        tail = self.compute(context, spec).iloc[-(len(df) - n):]
+        return pd.concat([prev_frame, tail])
@@ -0,0 +1,190 @@
+import time
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.linear_model import LinearRegression
+
+from utils.features import date_values
+
+class HorizonForecaster:
+    """Multi-step forecaster producing 1..horizon step-ahead predictions from lagged values
+
+    Each origin t is described by the last `lags` target values (y_t, y_t-1, ...)
+    and a sin/cos encoding of its day of year. Two strategies are supported:
+
+    - 'direct': one multi-output model maps the origin features to all
+      horizons at once, so a forecast is a single predict call.
+    - 'recursive': a one-step model is applied `horizon` times, feeding each
+      prediction back into the lag window. Every step is one batched predict
+      call over all series and origins, never one call per series.
+
+    Rows are assumed to be regularly spaced and sorted by date within each
+    city (the 'city' column, when present, separates series).
+    """
+
+    STRATEGIES = ('direct', 'recursive')
+
+    def __init__(self, horizon=5, lags=7, strategy='direct', model=None, target='temperature'):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"strategy must be one of {self.STRATEGIES}")
+        self.horizon = horizon
+        self.lags = lags
+        self.strategy = strategy
+        self.model = model if model is not None else LinearRegression()
+        self.target = target
+        self.model_ = None
+        self.step_ = None
+
+    @staticmethod
+    def _calendar(dates):
+        angle = 2 * np.pi * dates.dt.dayofyear.to_numpy(dtype='float64') / 365.25
+        return np.column_stack([np.sin(angle), np.cos(angle)])
+
+    def _design(self, df):
+        """Build lag windows, calendar features and the horizon target matrix for every row"""
+        y = df[self.target].reset_index(drop=True).astype('float64')
+        groups = df['city'].reset_index(drop=True) if 'city' in df.columns else None
+
+        def shift(periods):
+            if groups is None:
+                return y.shift(periods).to_numpy()
+            return y.groupby(groups, observed=True, sort=False).shift(periods).to_numpy()
+
+        windows = np.column_stack([shift(k) for k in range(self.lags)])
+        targets = np.column_stack([shift(-h) for h in range(1, self.horizon + 1)])
+        dates = date_values(df).reset_index(drop=True)
+        return windows, targets, dates, groups
+
+    def _features(self, windows, dates):
+        return np.hstack([windows, self._calendar(dates)])
+
+    def _infer_step(self, dates, groups):
+        if groups is None:
+            deltas = dates.diff()
+        else:
+            deltas = dates.groupby(groups, observed=True, sort=False).diff()
+        step = deltas.dropna().median()
+        return step if pd.notna(step) else pd.Timedelta(days=1)
+
+    def _fit_arrays(self, windows, targets, dates):
+        model = clone(self.model)
+        X = self._features(windows, dates)
+        Y = targets if self.strategy == 'direct' else targets[:, 0]
+        return model.fit(X, Y)
+
+    def fit(self, df):
+        """Fit on every row with a complete lag window and horizon"""
+        windows, targets, dates, groups = self._design(df)
+        self.step_ = self._infer_step(dates, groups)
+        required = targets if self.strategy == 'direct' else targets[:, :1]
+        valid = ~np.isnan(windows).any(axis=1) & ~np.isnan(required).any(axis=1)
+        if not valid.any():
+            raise ValueError("Not enough history to build lag windows and horizon targets")
+        self.model_ = self._fit_arrays(windows[valid], targets[valid], dates[valid])
+        return self
+
+    def _predict_arrays(self, model, windows, dates):
+        """Predict all horizons for many origins at once, returning an (n, horizon) array"""
+        if self.strategy == 'direct':
+            return np.asarray(model.predict(self._features(windows, dates))).reshape(len(windows), self.horizon)
+
+        forecasts = np.empty((len(windows), self.horizon))
+        windows = windows.copy()
+        for h in range(self.horizon):
+            step_dates = dates + h * self.step_
+            forecasts[:, h] = model.predict(self._features(windows, step_dates))
+            windows = np.column_stack([forecasts[:, h], windows[:, :-1]])
+        return forecasts
+
+    def predict(self, df):
+        """Forecast the next `horizon` steps after the last row of each series
+
+        Returns a long frame with the city (if any), origin date, step, target
+        date and forecast value.
+        """
+        if self.model_ is None:
+            raise RuntimeError("Forecaster is not fitted")
+        windows, _, dates, groups = self._design(df)
+        if groups is None:
+            last = np.array([len(windows) - 1])
+        else:
+            last = pd.Series(np.arange(len(windows))).groupby(groups, observed=True, sort=False).last().to_numpy()
+        last = last[~np.isnan(windows[last]).any(axis=1)]
+        origins = dates.iloc[last].reset_index(drop=True)
+        forecasts = self._predict_arrays(self.model_, windows[last], origins)
+
+        steps = np.arange(1, self.horizon + 1)
+        result = pd.DataFrame({
+            'origin': np.repeat(origins.to_numpy(), self.horizon),
+            'step': np.tile(steps, len(last)),
+            'forecast': forecasts.ravel()
+        })
+        result['date'] = result['origin'] + result['step'] * self.step_
+        if groups is not None:
+            result.insert(0, 'city', np.repeat(groups.iloc[last].to_numpy(), self.horizon))
+        return result
+
+    def backtest(self, df, initial_fraction=0.5, refit_every=30, max_origins=None):
+        """Rolling-origin backtest over every city and origin after an initial training period
+
+        Origins are grouped into blocks of `refit_every` consecutive dates. The
+        model is refit once per block on targets fully observed before the
+        block starts, then all origins of the block (across all cities) are
+        forecast in one vectorized pass. Returns per-horizon and per-city errors.
+        """
+        start = time.perf_counter()
+        windows, targets, dates, groups = self._design(df)
+        self.step_ = self.step_ or self._infer_step(dates, groups)
+        complete = ~np.isnan(windows).any(axis=1) & ~np.isnan(targets).any(axis=1)
+
+        unique_dates = np.sort(dates[complete].unique())
+        if len(unique_dates) < 2:
+            raise ValueError("Not enough history to backtest")
+        origin_dates = unique_dates[int(len(unique_dates) * initial_fraction):]
+        if max_origins is not None:
+            origin_dates = origin_dates[-max_origins:]
+        blocks = [origin_dates[i:i + refit_every] for i in range(0, len(origin_dates), refit_every)]
+
+        # The last date each row's horizon reaches, to keep training targets in the past
+        horizon_end = dates + self.horizon * self.step_
+        errors, cities, origins, fits = [], [], [], 0
+        for block in blocks:
+            block_start = pd.Timestamp(block[0])
+            train = complete & (horizon_end < block_start).to_numpy()
+            test = complete & dates.isin(block).to_numpy()
+            if not train.any() or not test.any():
+                continue
+            model = self._fit_arrays(windows[train], targets[train], dates[train])
+            fits += 1
+            forecasts = self._predict_arrays(model, windows[test], dates[test].reset_index(drop=True))
+            errors.append(forecasts - targets[test])
+            origins.append(dates[test].to_numpy())
+            if groups is not None:
+                cities.append(groups[test].to_numpy())
+
+        if not errors:
+            raise ValueError("No origins could be scored; lower initial_fraction")
+        errors = np.vstack(errors)
+        steps = np.arange(1, self.horizon + 1)
+        per_horizon = pd.DataFrame({
+            'step': steps,
+            'rmse': np.sqrt(np.mean(errors ** 2, axis=0)),
+            'mae': np.mean(np.abs(errors), axis=0),
+            'bias': np.mean(errors, axis=0)
+        })
+        per_city = None
+        if groups is not None:
+            squared = pd.DataFrame(errors ** 2, columns=steps)
+            squared['city'] = np.concatenate(cities)
+            per_city = np.sqrt(squared.groupby('city', observed=True).mean())
+            per_city.columns = [f'rmse_step_{s}' for s in steps]
+            per_city = per_city.reset_index()
+        return {
+            'per_horizon': per_horizon,
+            'per_city': per_city,
+            'rmse': float(np.sqrt(np.mean(errors ** 2))),
+            'origins': len(errors),
+            'origin_dates': len(np.unique(np.concatenate(origins))),
+            'fits': fits,
+            'seconds': time.perf_counter() - start
+        }
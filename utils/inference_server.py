@@ -0,0 +1,238 @@
+"""Standalone HTTP inference service for registered weather models
+
+Run with: python -m utils.inference_server --port 8600 [--model "Random Forest"]
+
+Endpoints:
+    POST /predict  {"instances": [{"day_of_year": 10, ...}, ...]} or {"rows": [[10, 1, 60.0, 1013.0], ...]}
+    GET  /metrics  latency percentiles, throughput and batching counters
+    GET  /health   model identity
+"""
+import argparse
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Empty, Queue
+
+import numpy as np
+import pandas as pd
+
+from utils.model_registry import ModelRegistry
+
+class LatencyStats:
+    """Thread-safe request counters with a sliding window of latencies for percentiles"""
+
+    def __init__(self, window=10000):
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.requests = 0
+        self.rows = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_rows = 0
+
+    def record_request(self, seconds, rows):
+        with self._lock:
+            self._latencies.append(seconds)
+            self.requests += 1
+            self.rows += rows
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def record_batch(self, rows):
+        with self._lock:
+            self.batches += 1
+            self.batched_rows += rows
+
+    def snapshot(self):
+        with self._lock:
+            latencies = np.fromiter(self._latencies, dtype='float64')
+            uptime = time.monotonic() - self.started
+            p50, p99 = np.percentile(latencies, [50, 99]) if len(latencies) else (0.0, 0.0)
+            return {
+                'requests': self.requests,
+                'rows': self.rows,
+                'errors': self.errors,
+                'batches': self.batches,
+                'mean_batch_rows': self.batched_rows / self.batches if self.batches else 0.0,
+                'latency_p50_ms': 1000 * p50,
+                'latency_p99_ms': 1000 * p99,
+                'requests_per_sec': self.requests / uptime if uptime else 0.0,
+                'rows_per_sec': self.rows / uptime if uptime else 0.0,
+                'uptime_sec': uptime
+            }
+
+class MicroBatcher:
+    """Coalesces concurrent prediction requests into single vectorized predict calls
+
+    Requests wait at most `max_wait_ms` for others to join a batch, and a
+    batch never exceeds `max_batch_rows` rows.
+    """
+
+    def __init__(self, model, features, max_batch_rows=4096, max_wait_ms=2.0, stats=None):
+        self.model = model
+        self.features = list(features)
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000
+        self.stats = stats or LatencyStats()
+        self._queue = Queue()
+        self._worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._worker.start()
+
+    def submit(self, rows):
+        """Queue a (n, n_features) array and return a Future for its predictions"""
+        future = Future()
+        self._queue.put((rows, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except Empty:
+                    break
+                batch.append(item)
+                size += len(item[0])
+            self._predict(batch, size)
+
+    def _predict(self, batch, size):
+        try:
+            X = pd.DataFrame(np.concatenate([rows for rows, _ in batch]), columns=self.features)
+            predictions = np.asarray(self.model.predict(X), dtype='float64')
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self.stats.record_batch(size)
+        offset = 0
+        for rows, future in batch:
+            future.set_result(predictions[offset:offset + len(rows)])
+            offset += len(rows)
+
+def parse_rows(payload, features):
+    """Validate a request payload and return a float64 (n, n_features) array"""
+    if 'rows' in payload:
+        rows = np.asarray(payload['rows'], dtype='float64')
+    elif 'instances' in payload:
+        rows = np.array(
+            [[instance[name] for name in features] for instance in payload['instances']],
+            dtype='float64'
+        )
+    else:
+        raise ValueError("Expected 'rows' or 'instances' in request body")
+    if rows.ndim != 2 or rows.shape[1] != len(features) or len(rows) == 0:
+        raise ValueError(f"Expected a non-empty list of rows with {len(features)} features: {features}")
+    return rows
+
+def make_handler(batcher, entry, timeout=10.0):
+    """Create the request handler class bound to a batcher and registry entry"""
+
+    class InferenceHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == '/metrics':
+                self._send_json(200, batcher.stats.snapshot())
+            elif self.path == '/health':
+                self._send_json(200, {
+                    'status': 'ok',
+                    'model': entry['model_name'],
+                    'model_id': entry['id'],
+                    'features': entry['features']
+                })
+            else:
+                self._send_json(404, {'error': 'Not found'})
+
+        def do_POST(self):
+            if self.path != '/predict':
+                self._send_json(404, {'error': 'Not found'})
+                return
+            start = time.perf_counter()
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                rows = parse_rows(json.loads(self.rfile.read(length)), batcher.features)
+            except (ValueError, KeyError, TypeError) as e:
+                batcher.stats.record_error()
+                self._send_json(400, {'error': str(e)})
+                return
+            try:
+                predictions = batcher.submit(rows).result(timeout=timeout)
+            except Exception as e:
+                batcher.stats.record_error()
+                self._send_json(500, {'error': str(e)})
+                return
+            batcher.stats.record_request(time.perf_counter() - start, len(rows))
+            self._send_json(200, {'predictions': predictions.tolist()})
+
+    return InferenceHandler
+
+class InferenceHTTPServer(ThreadingHTTPServer):
+    """Threaded server with a listen backlog deep enough for bursts of concurrent clients
+
+    The default backlog of 5 makes the kernel reset connections under load,
+    long before request batching becomes the bottleneck.
+    """
+    request_queue_size = 1024
+    daemon_threads = True
+
+def create_server(host='127.0.0.1', port=8600, model_name=None, registry=None,
+                  max_batch_rows=4096, max_wait_ms=2.0):
+    """Load the newest registered model once and return a ready-to-run HTTP server"""
+    registry = registry or ModelRegistry()
+    entry = registry.find(model_name=model_name)
+    if entry is None:
+        raise RuntimeError("No saved model found in the registry; train a model first")
+    model = registry.load(entry)
+    batcher = MicroBatcher(model, entry['features'], max_batch_rows, max_wait_ms)
+    server = InferenceHTTPServer((host, port), make_handler(batcher, entry))
+    server.batcher = batcher
+    server.entry = entry
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve weather model predictions over HTTP")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8600)
+    parser.add_argument('--model', default=None, help="Registered model name (default: newest)")
+    parser.add_argument('--registry', default=None, help="Model registry directory")
+    parser.add_argument('--max-batch-rows', type=int, default=4096)
+    parser.add_argument('--max-wait-ms', type=float, default=2.0)
+    args = parser.parse_args()
+
+    server = create_server(
+        args.host, args.port, args.model, ModelRegistry(args.registry),
+        args.max_batch_rows, args.max_wait_ms
+    )
+    print(f"Serving {server.entry['model_name']} ({server.entry['id']}) on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
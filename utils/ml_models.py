@@ -1,29 +1,234 @@
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LinearRegression
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+import copy
+import logging
+import time
+from contextlib import contextmanager, nullcontext
+from joblib import Parallel, delayed, parallel_backend
+from sklearn.base import BaseEstimator, RegressorMixin, clone
+from sklearn.model_selection import KFold, TimeSeriesSplit, train_test_split
+from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error, r2_score
+from xgboost import XGBRegressor
 import numpy as np
 import pandas as pd
 
+from utils.features import content_hash
+from utils.instrumentation import METRICS
+
+logger = logging.getLogger(__name__)
+
+@contextmanager
+def timed(timings, phase):
+    """Record the wall time of a block under timings[phase]"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = time.perf_counter() - start
+
+def _fit_and_score(name, model, X, y, train_idx, test_idx, split):
+    """Fit a fresh copy of model on one split and score it; runs in a worker process"""
+    model = clone(model)
+    if 'n_jobs' in model.get_params():
+        # Parallelism comes from the pool of splits, so keep each fit single-threaded
+        model.set_params(n_jobs=1)
+    start = time.perf_counter()
+    model.fit(X[train_idx], y[train_idx])
+    fit_time = time.perf_counter() - start
+    start = time.perf_counter()
+    y_pred = model.predict(X[test_idx])
+    predict_time = time.perf_counter() - start
+    return {
+        'model': name,
+        'split': split,
+        'rmse': np.sqrt(mean_squared_error(y[test_idx], y_pred)),
+        'r2': r2_score(y[test_idx], y_pred),
+        'fit_time': fit_time,
+        'predict_time': predict_time,
+        'rows': len(test_idx)
+    }
+
+def conformal_quantile(residuals, alpha=0.05):
+    """Split-conformal half-width: the finite-sample (1 - alpha) quantile of absolute residuals"""
+    residuals = np.abs(np.asarray(residuals, dtype='float64'))
+    n = len(residuals)
+    # The ceil((n + 1)(1 - alpha))-th smallest residual, or the largest for small n
+    rank = min(n, int(np.ceil((n + 1) * (1 - alpha))))
+    return float(np.partition(residuals, rank - 1)[rank - 1])
+
+def split_positions(n, split='random', calibration_size=0.2):
+    """Row positions of the fit, calibration and test parts shared by train_model and train_all
+
+    The last (with `split='time'`) or a random 20% of rows is the test set,
+    and a `calibration_size` share of the rest is held out for intervals.
+    """
+    options = {'shuffle': False} if split == 'time' else {'random_state': 42}
+    train, test = train_test_split(np.arange(n), test_size=0.2, **options)
+    fit, calibration = train_test_split(train, test_size=calibration_size, **options)
+    return fit, calibration, test
+
+class BoostedTreesRegressor(RegressorMixin, BaseEstimator):
+    """XGBoost histogram booster with early stopping on an internal validation split
+
+    Wraps `xgboost.XGBRegressor(tree_method='hist')`, which is multithreaded and
+    handles missing values natively. A `validation_fraction` of the rows passed
+    to `fit` is held out to pick the number of boosting rounds, so the estimator
+    works unchanged inside cross-validation: a random sample by default, or
+    with `shuffle=False` the trailing rows, so that time-ordered data never
+    picks its stopping round on rows older than the ones it trains on. With
+    `warm_start`, refitting continues boosting from the best iteration of the
+    previous booster instead of starting over.
+    """
+
+    def __init__(self, n_estimators=500, learning_rate=0.1, max_depth=5, subsample=0.8,
+                 early_stopping_rounds=20, validation_fraction=0.1, n_jobs=None, random_state=42,
+                 warm_start=False, shuffle=True):
+        self.n_estimators = n_estimators
+        self.learning_rate = learning_rate
+        self.max_depth = max_depth
+        self.subsample = subsample
+        self.early_stopping_rounds = early_stopping_rounds
+        self.validation_fraction = validation_fraction
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.warm_start = warm_start
+        self.shuffle = shuffle
+
+    def fit(self, X, y, rounds=None, warm_start=None):
+        """Fit the booster; `rounds` and `warm_start` override the parameters for this call only"""
+        warm_start = self.warm_start if warm_start is None else warm_start
+        previous = None
+        if warm_start and hasattr(self, 'model_'):
+            # Continue from the rounds predict() uses, not the ones boosted past them
+            previous = self.model_.get_booster()[:self.model_.best_iteration + 1]
+        X_train, X_val, y_train, y_val = train_test_split(
+            X, y, test_size=self.validation_fraction, shuffle=self.shuffle,
+            random_state=self.random_state if self.shuffle else None
+        )
+        self.model_ = XGBRegressor(
+            n_estimators=self.n_estimators if rounds is None else rounds,
+            learning_rate=self.learning_rate,
+            max_depth=self.max_depth,
+            subsample=self.subsample,
+            tree_method='hist',
+            early_stopping_rounds=self.early_stopping_rounds,
+            n_jobs=self.n_jobs,
+            random_state=self.random_state
+        )
+        self.model_.fit(X_train, y_train, eval_set=[(X_val, y_val)], verbose=False, xgb_model=previous)
+        self.best_iteration_ = self.model_.best_iteration + 1
+        return self
+
+    def predict(self, X):
+        # XGBoost predicts with the best iteration found by early stopping
+        return self.model_.predict(X)
+
+    @property
+    def feature_importances_(self):
+        return self.model_.feature_importances_
+
+def time_ordered(model):
+    """Fresh copy of a model whose internal validation split, if any, keeps the row order"""
+    model = clone(model)
+    if 'shuffle' in model.get_params():
+        model.set_params(shuffle=False)
+    return model
+
+class IncrementalLinearRegression(RegressorMixin, BaseEstimator):
+    """Ordinary least squares fitted from running, mergeable sufficient statistics
+
+    `partial_fit` folds new rows into the running means and centered
+    cross-product matrices (Chan et al. pairwise update), so adding rows costs
+    O(rows * features^2) and solving costs O(features^3), independent of how
+    many rows have been seen.
+    """
+
+    def __init__(self, alpha=1e-10):
+        self.alpha = alpha
+
+    def fit(self, X, y):
+        for attr in ('n_samples_seen_', 'mean_x_', 'mean_y_', 'sxx_', 'sxy_'):
+            self.__dict__.pop(attr, None)
+        return self.partial_fit(X, y)
+
+    def partial_fit(self, X, y):
+        X = np.asarray(X, dtype='float64')
+        y = np.asarray(y, dtype='float64')
+        n_b = len(X)
+        if n_b == 0:
+            return self
+        mean_xb = X.mean(axis=0)
+        mean_yb = y.mean()
+        Xc = X - mean_xb
+        sxx_b = Xc.T @ Xc
+        sxy_b = Xc.T @ (y - mean_yb)
+
+        if not hasattr(self, 'n_samples_seen_'):
+            self.n_samples_seen_ = n_b
+            self.n_features_in_ = X.shape[1]
+            self.mean_x_, self.mean_y_ = mean_xb, mean_yb
+            self.sxx_, self.sxy_ = sxx_b, sxy_b
+        else:
+            n_a = self.n_samples_seen_
+            n = n_a + n_b
+            dx = mean_xb - self.mean_x_
+            dy = mean_yb - self.mean_y_
+            self.sxx_ = self.sxx_ + sxx_b + np.outer(dx, dx) * n_a * n_b / n
+            self.sxy_ = self.sxy_ + sxy_b + dx * dy * n_a * n_b / n
+            self.mean_x_ = self.mean_x_ + dx * n_b / n
+            self.mean_y_ = self.mean_y_ + dy * n_b / n
+            self.n_samples_seen_ = n
+
+        ridge = self.alpha * max(np.trace(self.sxx_), 1.0) * np.eye(len(self.sxx_))
+        self.coef_ = np.linalg.lstsq(self.sxx_ + ridge, self.sxy_, rcond=None)[0]
+        self.intercept_ = self.mean_y_ - self.mean_x_ @ self.coef_
+        return self
+
+    def predict(self, X):
+        return np.asarray(X, dtype='float64') @ self.coef_ + self.intercept_
+
+class FoldEnsemble:
+    """Averages the predictions of the models fitted on each cross-validation fold"""
+
+    def __init__(self, estimators):
+        self.estimators_ = list(estimators)
+
+    def predict(self, X):
+        return np.mean([est.predict(X) for est in self.estimators_], axis=0)
+
+    @property
+    def feature_importances_(self):
+        return np.mean([est.feature_importances_ for est in self.estimators_], axis=0)
+
+    @property
+    def coef_(self):
+        return np.mean([est.coef_ for est in self.estimators_], axis=0)
+
 class WeatherPredictor:
-    def __init__(self):
+    def __init__(self, n_jobs=None, backend=None, registry=None):
+        # n_jobs parallelizes both the CV folds and tree building; backend selects
+        # the joblib backend ('loky', 'threading', ...) used for both.
+        self.n_jobs = n_jobs
+        self.backend = backend
+        self.registry = registry
         self.models = {
-            'Linear Regression': LinearRegression(),
+            # Same OLS solution as LinearRegression, but it can absorb new rows in update()
+            'Linear Regression': IncrementalLinearRegression(),
             'Random Forest': RandomForestRegressor(
                 n_estimators=200,
                 max_depth=10,
                 min_samples_split=5,
                 min_samples_leaf=2,
-                random_state=42
+                random_state=42,
+                n_jobs=n_jobs
             ),
-            'XGBoost': GradientBoostingRegressor(
-                n_estimators=200,
+            'XGBoost': BoostedTreesRegressor(
+                n_estimators=500,
                 learning_rate=0.1,
                 max_depth=5,
-                min_samples_split=5,
-                min_samples_leaf=2,
                 subsample=0.8,
-                random_state=42
+                early_stopping_rounds=20,
+                random_state=42,
+                n_jobs=n_jobs
             )
         }
         self.current_model = None
@@ -31,51 +236,129 @@ class WeatherPredictor:
         self.feature_importance = None
         self.is_trained = False
         self.cv_scores = None
+        self.timings = None
+        self.model_entry = None
+        self.online_metrics = None
+        self._recent = None
+        self._owns_model = False
+        self.interval_alpha = None
+        self.interval_halfwidth = None
+
+    def _parallel(self):
+        """Context selecting the configured joblib backend, if any"""
+        if self.backend is None:
+            return nullcontext()
+        return parallel_backend(self.backend, n_jobs=self.n_jobs)
 
-    def train_model(self, X, y, model_name='Linear Regression'):
-        """Train the selected model with cross-validation"""
-        from sklearn.model_selection import cross_val_score
+    def train_model(self, X, y, model_name='Linear Regression', reuse_fold_models=False,
+                    feature_spec=None, split='random', interval_alpha=0.05, calibration_size=0.2,
+                    dates=None):
+        """Train the selected model with cross-validation
+
+        `split='time'` holds out the most recent 20% of rows and cross-validates
+        with chronological TimeSeriesSplit folds, so no fold trains on the future;
+        rows must be in date order. With `reuse_fold_models`, the models fitted
+        during cross-validation are averaged into the final model instead of
+        refitting on the training split; under `split='time'` the early folds
+        only see a short prefix of the history, so the last fold's model, which
+        trained on all but the final fold, is used on its own.
+        Prediction intervals are split-conformal: a `calibration_size` share of
+        the training split (its most recent rows with `split='time'`) is held
+        out from cross-validation and fitting, and the half-width is the
+        conformal quantile of the final model's residuals on it.
+        The training rows are kept, in time order (by `dates` if given, else
+        by row order), as the recent history `update` refits the trees on.
+        Wall time per phase is returned under 'timings'. When a registry is
+        attached, the fitted model is saved to it with its metrics.
+        """
+        from sklearn.model_selection import cross_validate
+        timings = {}
         try:
             # Split the data
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42
-            )
+            with timed(timings, 'split'):
+                fit_pos, cal_pos, test_pos = split_positions(len(X), split, calibration_size)
+                X_fit, y_fit = X.iloc[fit_pos], y.iloc[fit_pos]
+                # Calibration slice for the prediction intervals, unseen by the fitted models
+                X_cal, y_cal = X.iloc[cal_pos], y.iloc[cal_pos]
+                X_test, y_test = X.iloc[test_pos], y.iloc[test_pos]
+                cv = TimeSeriesSplit(n_splits=5) if split == 'time' else KFold(n_splits=5)
             
             # Select and train the model
-            self.current_model = self.models[model_name]
+            # A fresh copy, so online updates never alter the configured model
+            model = self.models[model_name]
+            self.current_model = time_ordered(model) if split == 'time' else clone(model)
             self.current_model_name = model_name
+            self._owns_model = True
             
-            # Perform cross-validation
-            cv_scores = cross_val_score(
-                self.current_model, X_train, y_train,
-                cv=5, scoring='neg_mean_squared_error'
-            )
-            self.cv_scores = np.sqrt(-cv_scores)  # Convert to RMSE
+            with self._parallel():
+                # Perform cross-validation, one fold per worker
+                with timed(timings, 'cv'):
+                    cv_results = cross_validate(
+                        self.current_model, X_fit, y_fit,
+                        cv=cv, scoring='neg_mean_squared_error',
+                        n_jobs=self.n_jobs, return_estimator=True
+                    )
+                self.cv_scores = np.sqrt(-cv_results['test_score'])  # Convert to RMSE
+            
+                # Train the final model
+                with timed(timings, 'fit'):
+                    if reuse_fold_models and split == 'time':
+                        self.current_model = cv_results['estimator'][-1]
+                    elif reuse_fold_models:
+                        self.current_model = FoldEnsemble(cv_results['estimator'])
+                    else:
+                        self.current_model.fit(X_fit, y_fit)
             
-            # Train the final model
-            self.current_model.fit(X_train, y_train)
+                # Calibrate intervals on the final model's residuals on the held-out slice
+                with timed(timings, 'calibrate'):
+                    residuals = y_cal.to_numpy() - self.current_model.predict(X_cal)
+                    self.interval_alpha = interval_alpha
+                    self.interval_halfwidth = conformal_quantile(residuals, interval_alpha)
             
-            # Make predictions on test set
-            y_pred = self.current_model.predict(X_test)
+                # Make predictions on test set
+                with timed(timings, 'predict'):
+                    y_pred = self.current_model.predict(X_test)
             
             # Calculate metrics
             mse = mean_squared_error(y_test, y_pred)
             rmse = np.sqrt(mse)
             r2 = r2_score(y_test, y_pred)
+            lower, upper = y_pred - self.interval_halfwidth, y_pred + self.interval_halfwidth
+            coverage = float(np.mean((y_test >= lower) & (y_test <= upper)))
             
             # Calculate feature importance
-            if model_name in ['Random Forest', 'XGBoost']:
-                self.feature_importance = pd.DataFrame({
-                    'feature': X.columns,
-                    'importance': self.current_model.feature_importances_
-                }).sort_values('importance', ascending=False)
-            elif model_name == 'Linear Regression':
-                self.feature_importance = pd.DataFrame({
-                    'feature': X.columns,
-                    'importance': np.abs(self.current_model.coef_)
-                }).sort_values('importance', ascending=False)
+            with timed(timings, 'importance'):
+                self.feature_importance = self._compute_importance(X.columns)
             
             self.is_trained = True
+            self.timings = timings
+            self.online_metrics = None
+            # The shuffled training rows back in time order, so update() refits on the latest ones
+            recent = np.sort(np.concatenate([fit_pos, cal_pos]))
+            if dates is not None:
+                recent = recent[np.argsort(np.asarray(dates)[recent], kind='stable')]
+            self._recent = (X.iloc[recent], y.iloc[recent])
+            
+            if self.registry is not None:
+                with timed(timings, 'save'):
+                    self.model_entry = self.registry.save(
+                        self.current_model, model_name, X.columns,
+                        metrics={
+                            'rmse': rmse,
+                            'r2': r2,
+                            'cv_rmse_mean': np.mean(self.cv_scores),
+                            'cv_rmse_std': np.std(self.cv_scores),
+                            'interval_alpha': interval_alpha,
+                            'interval_halfwidth': self.interval_halfwidth
+                        },
+                        feature_importance=self.feature_importance,
+                        feature_spec=feature_spec,
+                        data_hash=content_hash(X, y)
+                    )
+            
+            for phase, seconds in timings.items():
+                METRICS.observe('train_phase_seconds', seconds, model=model_name, phase=phase)
+            METRICS.inc('train_runs_total', model=model_name, status='ok')
             
             return {
                 'rmse': rmse,
@@ -85,10 +368,214 @@ class WeatherPredictor:
                 'test_predictions': y_pred,
                 'test_actual': y_test,
                 'test_features': X_test,
-                'feature_importance': self.feature_importance
+                'test_lower': lower,
+                'test_upper': upper,
+                'interval_coverage': coverage,
+                'feature_importance': self.feature_importance,
+                'timings': timings
             }
         except Exception as e:
-            print(f"Error in training: {str(e)}")
+            METRICS.inc('train_runs_total', model=model_name, status='error')
+            logger.exception(f"Error in training: {str(e)}")
+            return None
+
+    def backtest(self, X, y, dates, model_name='Linear Regression', **kwargs):
+        """Walk-forward backtest of a model over chronological folds (see utils.backtesting)"""
+        from utils.backtesting import Backtester
+        try:
+            return Backtester(self.models[model_name], **kwargs).run(X, y, dates)
+        except Exception as e:
+            logger.exception(f"Error in backtesting: {str(e)}")
+            return None
+
+    def train_all(self, X, y, model_names=None, n_jobs=None, cv=5, split='random', calibration_size=0.2):
+        """Train every model on identical splits in parallel and return a leaderboard
+
+        The split and the CV folds are computed once and shared by all models.
+        Every (model, split) fit is an independent task in a pool of worker
+        processes, so the run costs about as much as the slowest model. Models
+        are fitted on the same rows as in `train_model` with the same
+        `split` and `calibration_size` (the calibration slice is left unused)
+        and scored on the same test rows, so leaderboard and "Train Model"
+        metrics agree. `split='time'` uses chronological hold-outs and
+        TimeSeriesSplit folds; rows must be in date order.
+        Returns a DataFrame sorted by test RMSE.
+        """
+        model_names = model_names or list(self.models)
+        n_jobs = n_jobs if n_jobs is not None else (self.n_jobs or -1)
+        try:
+            X_values = np.asarray(X, dtype='float64')
+            y_values = np.asarray(y, dtype='float64')
+
+            # Same split as train_model, then shared CV folds over the fitting part
+            train_idx, _, test_idx = split_positions(len(X_values), split, calibration_size)
+            folds = TimeSeriesSplit(n_splits=cv) if split == 'time' else KFold(n_splits=cv)
+            splits = [('test', train_idx, test_idx)] + [
+                (f'fold_{i}', train_idx[fold_train], train_idx[fold_test])
+                for i, (fold_train, fold_test) in enumerate(folds.split(train_idx))
+            ]
+
+            models = {
+                name: time_ordered(self.models[name]) if split == 'time' else self.models[name]
+                for name in model_names
+            }
+            start = time.perf_counter()
+            with self._parallel():
+                scores = Parallel(n_jobs=n_jobs, backend=None if self.backend else 'loky')(
+                    delayed(_fit_and_score)(name, models[name], X_values, y_values, tr, te, part)
+                    for name in model_names
+                    for part, tr, te in splits
+                )
+            wall_time = time.perf_counter() - start
+
+            scores = pd.DataFrame(scores)
+            test = scores[scores['split'] == 'test'].set_index('model')
+            folds = scores[scores['split'] != 'test'].groupby('model')['rmse']
+            leaderboard = pd.DataFrame({
+                'rmse': test['rmse'],
+                'r2': test['r2'],
+                'cv_rmse_mean': folds.mean(),
+                'cv_rmse_std': folds.std(ddof=0),
+                'fit_time': test['fit_time'],
+                'predict_ms_per_1k_rows': 1000 * test['predict_time'] / test['rows'] * 1000
+            }).sort_values('rmse').reset_index()
+            leaderboard.attrs['wall_time'] = wall_time
+            leaderboard.attrs['total_fit_time'] = scores['fit_time'].sum()
+            return leaderboard
+        except Exception as e:
+            logger.exception(f"Error in training: {str(e)}")
+            return None
+
+    def load_latest(self, model_name=None, features=None, feature_spec=None, data_hash=None):
+        """Load the newest registered model matching the criteria as the current model
+
+        Loaded models are cached process-wide, so every session after the
+        first gets the model without touching disk. Returns the registry entry,
+        or None if nothing matches.
+        """
+        if self.registry is None:
+            return None
+        try:
+            entry = self.registry.find(model_name, features, feature_spec, data_hash)
+            if entry is None:
+                return None
+            
+            self.current_model = self.registry.load(entry)
+            self.current_model_name = entry['model_name']
+            self.feature_importance = self.registry.feature_importance(entry)
+            self.model_entry = entry
+            self.is_trained = True
+            self.online_metrics = None
+            self._recent = None
+            self.interval_alpha = entry['metrics'].get('interval_alpha')
+            self.interval_halfwidth = entry['metrics'].get('interval_halfwidth')
+            # The loaded object is shared through the registry cache
+            self._owns_model = False
+            return entry
+        except Exception as e:
+            logger.exception(f"Error loading saved model: {str(e)}")
+            return None
+
+    def _compute_importance(self, columns):
+        """Feature importance of the current model, by tree importance or absolute coefficient"""
+        if self.current_model_name in ['Random Forest', 'XGBoost']:
+            importance = self.current_model.feature_importances_
+        elif self.current_model_name == 'Linear Regression':
+            importance = np.abs(self.current_model.coef_)
+        else:
+            return None
+        return pd.DataFrame({
+            'feature': columns,
+            'importance': importance
+        }).sort_values('importance', ascending=False)
+
+    def _update_model(self, model, X_new, y_new, X_recent, y_recent, trees, max_trees):
+        if isinstance(model, FoldEnsemble):
+            for estimator in model.estimators_:
+                self._update_model(estimator, X_new, y_new, X_recent, y_recent, trees, max_trees)
+        elif hasattr(model, 'partial_fit'):
+            model.partial_fit(X_new, y_new)
+        elif isinstance(model, RandomForestRegressor):
+            # Grow the forest by `trees` trees fitted on the recent window, then restore
+            # the configured parameters so a later refit or clone builds the usual forest
+            params = model.get_params()
+            try:
+                model.set_params(warm_start=True, n_estimators=len(model.estimators_) + trees)
+                model.fit(X_recent, y_recent)
+            finally:
+                model.set_params(warm_start=params['warm_start'], n_estimators=params['n_estimators'])
+            if max_trees is not None and len(model.estimators_) > max_trees:
+                model.estimators_ = model.estimators_[-max_trees:]
+        elif isinstance(model, BoostedTreesRegressor):
+            # Continue boosting from the current booster on the recent window
+            model.fit(X_recent, y_recent, rounds=trees, warm_start=True)
+        else:
+            raise ValueError(f"{type(model).__name__} does not support online updates")
+
+    def update(self, X_new, y_new, trees=10, window=5000, max_trees=None, save=False):
+        """Fold newly arrived rows into the current model without retraining on full history
+
+        Linear Regression absorbs the rows into its sufficient statistics, which
+        gives exactly the model a full refit would. Random Forest adds `trees`
+        warm-started trees and XGBoost adds up to `trees` boosting rounds, both
+        fitted on the last `window` rows only (optionally capping the forest at
+        `max_trees` by dropping the oldest trees). So an update costs work
+        proportional to the new rows, not the total history.
+
+        The new rows are scored before they are learned from, and those
+        test-then-train errors accumulate into running metrics, returned and
+        kept in `online_metrics`.
+        """
+        if not self.is_trained or self.current_model is None:
+            return None
+        try:
+            start = time.perf_counter()
+            if not self._owns_model:
+                self.current_model = copy.deepcopy(self.current_model)
+                self._owns_model = True
+
+            errors = np.asarray(self.current_model.predict(X_new), dtype='float64') - np.asarray(y_new)
+            if self._recent is None:
+                X_recent, y_recent = X_new, y_new
+            else:
+                X_recent = pd.concat([self._recent[0], X_new]).iloc[-window:]
+                y_recent = pd.concat([self._recent[1], y_new]).iloc[-window:]
+            self._recent = (X_recent, y_recent)
+            self._update_model(self.current_model, X_new, y_new, X_recent, y_recent, trees, max_trees)
+            self.feature_importance = self._compute_importance(X_new.columns)
+
+            totals = self.online_metrics or {'rows': 0, 'updates': 0, 'sse': 0.0, 'sae': 0.0}
+            rows = totals['rows'] + len(errors)
+            sse = totals['sse'] + float(np.sum(errors ** 2))
+            sae = totals['sae'] + float(np.sum(np.abs(errors)))
+            self.online_metrics = {
+                'rows': rows,
+                'updates': totals['updates'] + 1,
+                'sse': sse,
+                'sae': sae,
+                'rmse': float(np.sqrt(sse / rows)),
+                'mae': sae / rows,
+                'last_rmse': float(np.sqrt(np.mean(errors ** 2))),
+                'seconds': time.perf_counter() - start
+            }
+
+            if save and self.registry is not None:
+                # Saved without a data hash: the model no longer matches one dataset
+                entry = self.model_entry or {}
+                self.model_entry = self.registry.save(
+                    self.current_model, self.current_model_name, X_new.columns,
+                    # Keep the metrics of the original fit alongside the online ones
+                    metrics={
+                        **entry.get('metrics', {}),
+                        'online_rmse': self.online_metrics['rmse'],
+                        'online_rows': rows
+                    },
+                    feature_importance=self.feature_importance,
+                    feature_spec=entry.get('feature_spec')
+                )
+            return self.online_metrics
+        except Exception as e:
+            logger.exception(f"Error in online update: {str(e)}")
             return None
 
     def predict(self, features):
@@ -100,9 +587,16 @@ class WeatherPredictor:
             predictions = self.current_model.predict(features)
             return predictions
         except Exception as e:
-            print(f"Error in prediction: {str(e)}")
+            logger.exception(f"Error in prediction: {str(e)}")
             return None
 
+    def predict_interval(self, features):
+        """Predict with split-conformal intervals; returns (predictions, lower, upper)"""
+        predictions = self.predict(features)
+        if predictions is None or self.interval_halfwidth is None:
+            return predictions, None, None
+        return predictions, predictions - self.interval_halfwidth, predictions + self.interval_halfwidth
+
     def get_feature_importance(self):
         """Return feature importance for the current model"""
         return self.feature_importance if self.is_trained else None
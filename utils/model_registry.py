@@ -0,0 +1,175 @@
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+import joblib
+import pandas as pd
+
+from utils.features import spec_key
+
+# Fitted models loaded in this process, shared by every Streamlit session; the least
+# recently used ones are evicted beyond WEATHER_MODEL_CACHE_SIZE
+_MODEL_CACHE = OrderedDict()
+_MODEL_CACHE_LOCK = threading.Lock()
+MODEL_CACHE_SIZE = int(os.getenv('WEATHER_MODEL_CACHE_SIZE', 32))
+
+class ModelRegistry:
+    """Local registry of fitted models saved with joblib plus a JSON metadata sidecar
+
+    Each entry records the model name, feature columns, feature spec hash, a
+    hash of the training data, metrics and feature importance. `save`
+    compresses by default (`compress=3`), and compressed entries are always
+    read fully into memory; only models saved with `compress=0` are loaded
+    memory-mapped (`mmap_mode='r'`), which shares the large tree arrays
+    between processes at the cost of larger files.
+
+    Only the newest `keep` entries (`WEATHER_MODEL_KEEP`, default 5) of each
+    model name, feature spec and key are kept; older ones are deleted on save,
+    or once per batch with `save(..., prune=False)` followed by `prune_all()`.
+    Parsed sidecars are cached by modification time, so lookups only read
+    files that are new or changed.
+    """
+
+    def __init__(self, path=None, keep=None):
+        self.path = path or os.getenv('WEATHER_MODEL_DIR', 'models')
+        self.keep = keep if keep is not None else int(os.getenv('WEATHER_MODEL_KEEP', 5))
+        os.makedirs(self.path, exist_ok=True)
+        self._sidecars = {}
+        self._lock = threading.Lock()
+
+    def save(self, model, model_name, features, metrics=None, feature_importance=None,
+             feature_spec=None, data_hash=None, compress=3, key=None, prune=True):
+        """Persist a fitted model and return its metadata entry
+
+        `key` identifies one of a family of models sharing a name, such as the
+        city of a per-city model; keyed entries are only found by their key.
+        Pruning scans every sidecar, so batches of saves should pass
+        `prune=False` and call `prune_all()` once at the end.
+        """
+        created = time.time()
+        entry_id = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(created))}-{uuid.uuid4().hex[:8]}"
+        model_file = os.path.join(self.path, f"{entry_id}.joblib")
+        joblib.dump(model, model_file, compress=compress)
+
+        entry = {
+            'id': entry_id,
+            'model_name': model_name,
+            'key': key,
+            'model_file': os.path.basename(model_file),
+            'created': created,
+            'compressed': bool(compress),
+            'features': list(features),
+            'feature_spec': feature_spec,
+            'spec_hash': spec_key(feature_spec) if feature_spec is not None else None,
+            'data_hash': data_hash,
+            'metrics': {k: float(v) for k, v in (metrics or {}).items()},
+            'feature_importance': (
+                feature_importance.to_dict(orient='records')
+                if feature_importance is not None else None
+            )
+        }
+        # Write the sidecar last so readers never see an entry without its model
+        tmp_file = os.path.join(self.path, f".{entry_id}.json.tmp")
+        with open(tmp_file, 'w') as f:
+            json.dump(entry, f)
+        meta_file = os.path.join(self.path, f"{entry_id}.json")
+        os.replace(tmp_file, meta_file)
+        with self._lock:
+            self._sidecars[meta_file] = (os.stat(meta_file).st_mtime_ns, entry)
+        if prune:
+            self.prune(model_name, entry['spec_hash'], key)
+        return entry
+
+    def prune(self, model_name, spec_hash=None, key=None):
+        """Delete all but the newest `keep` entries of one model name, spec hash and key"""
+        same = [
+            entry for entry in self.entries()
+            if entry['model_name'] == model_name and entry.get('spec_hash') == spec_hash
+            and entry.get('key') == key
+        ]
+        self._delete(same[self.keep:])
+
+    def prune_all(self):
+        """Delete all but the newest `keep` entries of every model name, spec hash and key"""
+        counts = {}
+        stale = []
+        for entry in self.entries():
+            group = (entry['model_name'], entry.get('spec_hash'), entry.get('key'))
+            counts[group] = counts.get(group, 0) + 1
+            if counts[group] > self.keep:
+                stale.append(entry)
+        self._delete(stale)
+
+    def _delete(self, entries):
+        for entry in entries:
+            model_file = os.path.join(self.path, entry['model_file'])
+            # Remove the sidecar first so the entry disappears before its model
+            for path in (os.path.join(self.path, f"{entry['id']}.json"), model_file):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            with _MODEL_CACHE_LOCK:
+                _MODEL_CACHE.pop(model_file, None)
+
+    def entries(self):
+        """Return all metadata entries, newest first"""
+        entries = []
+        seen = set()
+        with self._lock:
+            for meta_file in glob.glob(os.path.join(self.path, '*.json')):
+                try:
+                    mtime = os.stat(meta_file).st_mtime_ns
+                    cached = self._sidecars.get(meta_file)
+                    if cached is None or cached[0] != mtime:
+                        with open(meta_file) as f:
+                            cached = self._sidecars[meta_file] = (mtime, json.load(f))
+                except (OSError, ValueError):
+                    continue
+                seen.add(meta_file)
+                entries.append(cached[1])
+            # Forget sidecars deleted since the last call
+            for meta_file in set(self._sidecars) - seen:
+                del self._sidecars[meta_file]
+        return sorted(entries, key=lambda e: e['created'], reverse=True)
+
+    def find(self, model_name=None, features=None, feature_spec=None, data_hash=None, key=None):
+        """Return the newest entry matching all given criteria, or None"""
+        spec_hash = spec_key(feature_spec) if feature_spec is not None else None
+        for entry in self.entries():
+            if entry.get('key') != key:
+                continue
+            if model_name is not None and entry['model_name'] != model_name:
+                continue
+            if features is not None and entry['features'] != list(features):
+                continue
+            if spec_hash is not None and entry['spec_hash'] != spec_hash:
+                continue
+            if data_hash is not None and entry['data_hash'] != data_hash:
+                continue
+            return entry
+        return None
+
+    def load(self, entry, mmap_mode='r'):
+        """Load the model for an entry, reusing the process-wide cache"""
+        model_file = os.path.join(self.path, entry['model_file'])
+        with _MODEL_CACHE_LOCK:
+            model = _MODEL_CACHE.get(model_file)
+            if model is None:
+                model = joblib.load(model_file, mmap_mode=None if entry['compressed'] else mmap_mode)
+                _MODEL_CACHE[model_file] = model
+                while len(_MODEL_CACHE) > MODEL_CACHE_SIZE:
+                    _MODEL_CACHE.popitem(last=False)
+            else:
+                _MODEL_CACHE.move_to_end(model_file)
+        return model
+
+    @staticmethod
+    def feature_importance(entry):
+        """Return an entry's feature importance as a DataFrame"""
+        if not entry.get('feature_importance'):
+            return None
+        return pd.DataFrame(entry['feature_importance'])
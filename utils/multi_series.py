@@ -0,0 +1,190 @@
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import mean_squared_error, r2_score
+
+from utils.features import BASIC_FEATURE_SPEC, FeaturePipeline, date_values, spec_key
+from utils.ml_models import WeatherPredictor
+
+# Memory-mapped arrays opened by this (worker) process, keyed by file path
+_SHARED_ARRAYS = {}
+
+def _open_shared(path):
+    array = _SHARED_ARRAYS.get(path)
+    if array is None:
+        # Drop maps of earlier runs, whose files have been removed
+        for old in [p for p in _SHARED_ARRAYS if os.path.dirname(p) != os.path.dirname(path)]:
+            del _SHARED_ARRAYS[old]
+        array = _SHARED_ARRAYS[path] = np.load(path, mmap_mode='r')
+    return array
+
+def _fit_cities(model, x_path, y_path, tasks, holdout):
+    """Fit one model per (city, start, stop) slice of the shared arrays; runs in a worker process"""
+    X = _open_shared(x_path)
+    y = _open_shared(y_path)
+    results = []
+    for city, start, stop in tasks:
+        # Slices of the memory map are views: the city's rows are never copied or pickled
+        split = stop - int((stop - start) * holdout)
+        estimator = clone(model)
+        if 'n_jobs' in estimator.get_params():
+            estimator.set_params(n_jobs=1)
+        fit_start = time.perf_counter()
+        estimator.fit(X[start:split], y[start:split])
+        fit_time = time.perf_counter() - fit_start
+        rmse = r2 = np.nan
+        if stop - split > 1:
+            y_pred = estimator.predict(X[split:stop])
+            rmse = np.sqrt(mean_squared_error(y[split:stop], y_pred))
+            r2 = r2_score(y[split:stop], y_pred)
+        results.append((city, estimator, {
+            'city': city,
+            'rows': stop - start,
+            'rmse': rmse,
+            'r2': r2,
+            'fit_time': fit_time
+        }))
+    return results
+
+class MultiSeriesTrainer:
+    """Trains and serves one model per city from a long-format frame
+
+    Features for all cities are built in one grouped pass of the feature
+    pipeline, sorted so each city is a contiguous block, and written once to
+    memory-mapped .npy files. Worker processes map those files and fit the
+    models for a batch of cities from row ranges, so only the (city, start,
+    stop) tuples and the fitted models cross process boundaries. Cities are
+    batched into a few tasks per worker, which keeps scheduling overhead low
+    for thousands of cities. The most recent `holdout` fraction of each
+    city's rows is held out for its metrics.
+    """
+
+    def __init__(self, model_name='Linear Regression', feature_spec=None, n_jobs=-1,
+                 holdout=0.2, min_rows=10, tasks_per_worker=4):
+        self.model_name = model_name
+        self.feature_spec = feature_spec or BASIC_FEATURE_SPEC
+        self.n_jobs = n_jobs
+        self.holdout = holdout
+        self.min_rows = min_rows
+        self.tasks_per_worker = tasks_per_worker
+        self.feature_pipeline = FeaturePipeline()
+        self.models_ = {}
+        self.metrics_ = None
+        self.features_ = None
+        self.skipped_ = []
+        self.seconds_ = None
+
+    def _features(self, df):
+        """Feature frame, target and completeness mask for every row of df"""
+        features = self.feature_pipeline.transform(df, self.feature_spec)
+        complete = features.notna().all(axis=1).to_numpy()
+        target = self.feature_spec['target']
+        return features.drop(columns=target), features[target], complete
+
+    def _tasks(self, ranges, n_workers):
+        """Group (city, start, stop) ranges into a few batches per worker with similar row counts"""
+        n_tasks = max(1, min(len(ranges), n_workers * self.tasks_per_worker))
+        rows = np.cumsum([stop - start for _, start, stop in ranges])
+        cuts = np.searchsorted(rows, np.linspace(0, rows[-1], n_tasks + 1)[1:-1]) + 1
+        cuts = np.unique(np.concatenate([[0], cuts, [len(ranges)]]))
+        return [ranges[lo:hi] for lo, hi in zip(cuts[:-1], cuts[1:]) if hi > lo]
+
+    def fit(self, df):
+        """Fit one model per city of df (which must have a 'city' column) and return self"""
+        start = time.perf_counter()
+        if 'city' not in df.columns:
+            raise ValueError("Expected a long-format frame with a 'city' column")
+        X, y, complete = self._features(df)
+        self.features_ = list(X.columns)
+
+        # Order rows by city, then date, so each city is one contiguous block
+        codes, cities = pd.factorize(df['city'], sort=True)
+        dates = date_values(df).to_numpy()
+        order = np.lexsort((dates, codes))
+        order = order[complete[order]]
+        counts = np.bincount(codes[order], minlength=len(cities))
+        bounds = np.concatenate([[0], np.cumsum(counts)])
+
+        enough = counts >= self.min_rows
+        self.skipped_ = list(cities[~enough])
+
+        workdir = tempfile.mkdtemp(prefix='weather-series-')
+        try:
+            x_path = os.path.join(workdir, 'X.npy')
+            y_path = os.path.join(workdir, 'y.npy')
+            np.save(x_path, np.ascontiguousarray(X.to_numpy(dtype='float64')[order]))
+            np.save(y_path, y.to_numpy(dtype='float64')[order])
+
+            ranges = [(city, int(bounds[c]), int(bounds[c + 1])) for c, city in enumerate(cities) if enough[c]]
+            n_workers = os.cpu_count() if self.n_jobs in (None, -1) else max(1, self.n_jobs)
+            tasks = self._tasks(ranges, n_workers) if ranges else []
+
+            model = WeatherPredictor().models[self.model_name]
+            batches = Parallel(n_jobs=self.n_jobs, backend='loky')(
+                delayed(_fit_cities)(model, x_path, y_path, batch, self.holdout)
+                for batch in tasks
+            )
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        results = [result for batch in batches for result in batch]
+        self.models_ = {city: estimator for city, estimator, _ in results}
+        self.metrics_ = pd.DataFrame([metrics for _, _, metrics in results])
+        self.seconds_ = time.perf_counter() - start
+        return self
+
+    def predict(self, df):
+        """Predict each row with its city's model; rows without a model or full features get NaN"""
+        X, _, complete = self._features(df)
+        X_values = X.to_numpy(dtype='float64')
+        predictions = np.full(len(df), np.nan)
+        codes, cities = pd.factorize(df['city'])
+        # Group the complete rows by city once, then one predict call per city
+        rows = np.flatnonzero(complete)
+        rows = rows[np.argsort(codes[rows], kind='stable')]
+        bounds = np.searchsorted(codes[rows], np.arange(len(cities) + 1))
+        for code, city in enumerate(cities):
+            model = self.models_.get(city)
+            city_rows = rows[bounds[code]:bounds[code + 1]]
+            if model is not None and len(city_rows):
+                predictions[city_rows] = model.predict(X_values[city_rows])
+        return pd.Series(predictions, index=df.index, name='prediction')
+
+    def save(self, registry):
+        """Save every city's model to the registry, keyed by city; returns the entries"""
+        metrics = self.metrics_.set_index('city') if self.metrics_ is not None else None
+        entries = [
+            registry.save(
+                model, self.model_name, self.features_,
+                metrics=metrics.loc[city, ['rmse', 'r2']].to_dict() if metrics is not None else None,
+                feature_spec=self.feature_spec,
+                key=city,
+                prune=False
+            )
+            for city, model in self.models_.items()
+        ]
+        # One scan of the registry for the whole batch instead of one per city
+        registry.prune_all()
+        return entries
+
+    def load(self, registry, cities=None):
+        """Load the newest registered model of every (or each given) city; returns the count"""
+        wanted = set(cities) if cities is not None else None
+        spec_hash = spec_key(self.feature_spec)
+        loaded = set()
+        # Entries are newest first, so the first one seen for a city wins
+        for entry in registry.entries():
+            city = entry.get('key')
+            if city is None or city in loaded or entry['model_name'] != self.model_name:
+                continue
+            if entry['spec_hash'] != spec_hash or (wanted is not None and city not in wanted):
+                continue
+            self.models_[city] = registry.load(entry)
+            self.features_ = entry['features']
+            loaded.add(city)
+        return len(loaded)
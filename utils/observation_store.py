@@ -0,0 +1,159 @@
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+import pandas as pd
+
+# Measurement columns persisted for every observation
+MEASUREMENT_COLUMNS = ['temperature', 'feels_like', 'humidity', 'pressure', 'wind_speed']
+
+class ObservationStore:
+    """Local SQLite time-series store of weather observations keyed by (city, timestamp)"""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('WEATHER_STORE_PATH', os.path.join('data', 'observations.db'))
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            columns = ', '.join(f"{col} REAL" for col in MEASUREMENT_COLUMNS)
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS observations (
+                    city TEXT NOT NULL,
+                    timestamp INTEGER NOT NULL,
+                    {columns},
+                    PRIMARY KEY (city, timestamp)
+                ) WITHOUT ROWID
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_observations_timestamp ON observations (timestamp)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per call keeps the store safe to use from
+        # Streamlit's script threads and the bulk-fetch thread pool.
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _epoch(value):
+        """Convert a date-like value to UTC epoch seconds, treating naive values as UTC"""
+        ts = pd.Timestamp(value)
+        if ts.tzinfo is None:
+            ts = ts.tz_localize('UTC')
+        return int(ts.timestamp())
+
+    def append(self, df, city=None):
+        """Insert or update observations from a frame with a 'date'/'timestamp' column or DatetimeIndex
+
+        Rows already stored for the same (city, timestamp) are replaced, so
+        re-appending overlapping data is idempotent. Returns the number of rows written.
+        """
+        if df is None or len(df) == 0:
+            return 0
+
+        if 'timestamp' in df.columns or 'date' in df.columns:
+            time_col = 'timestamp' if 'timestamp' in df.columns else 'date'
+            timestamps = pd.to_datetime(df[time_col], utc=True)
+        else:
+            # Compact frames keep their dates in a DatetimeIndex
+            timestamps = pd.to_datetime(df.index.to_series(), utc=True)
+        rows = pd.DataFrame({
+            'city': df['city'].astype(str).to_numpy() if 'city' in df.columns else city,
+            'timestamp': timestamps.astype('int64').to_numpy() // 10**9
+        })
+        if rows['city'].isna().any():
+            raise ValueError("Observations need a 'city' column or an explicit city")
+        for col in MEASUREMENT_COLUMNS:
+            rows[col] = df[col].to_numpy(dtype='float64') if col in df.columns else None
+
+        columns = ['city', 'timestamp'] + MEASUREMENT_COLUMNS
+        placeholders = ', '.join('?' for _ in columns)
+        records = rows[columns].astype(object).where(rows[columns].notna(), None)
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO observations ({', '.join(columns)}) VALUES ({placeholders})",
+                records.itertuples(index=False, name=None)
+            )
+        return len(rows)
+
+    def append_reading(self, city, data):
+        """Append a raw OpenWeatherMap current-weather payload for a city"""
+        main = data.get('main', {})
+        reading = {
+            'city': city,
+            'timestamp': data.get('dt', int(time.time())),
+            'temperature': main.get('temp'),
+            'feels_like': main.get('feels_like'),
+            'humidity': main.get('humidity'),
+            'pressure': main.get('pressure'),
+            'wind_speed': data.get('wind', {}).get('speed')
+        }
+        frame = pd.DataFrame([reading])
+        frame['timestamp'] = pd.to_datetime(frame['timestamp'], unit='s', utc=True)
+        return self.append(frame)
+
+    def _query(self, cities, start, end, columns):
+        """Build the SQL for a range scan, pushing city/time filters and columns down"""
+        selected = [col for col in (columns or MEASUREMENT_COLUMNS) if col in MEASUREMENT_COLUMNS]
+        clauses = []
+        params = []
+        if cities:
+            cities = [cities] if isinstance(cities, str) else list(cities)
+            clauses.append(f"city IN ({', '.join('?' for _ in cities)})")
+            params.extend(cities)
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(self._epoch(start))
+        if end is not None:
+            clauses.append("timestamp <= ?")
+            params.append(self._epoch(end))
+
+        sql = f"SELECT city, timestamp, {', '.join(selected)} FROM observations"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY city, timestamp"
+        return sql, params
+
+    @staticmethod
+    def _to_frame(chunk):
+        chunk['date'] = pd.to_datetime(chunk.pop('timestamp'), unit='s', utc=True).dt.tz_localize(None)
+        chunk['city'] = chunk['city'].astype('category')
+        measurements = [c for c in chunk.columns if c in MEASUREMENT_COLUMNS]
+        chunk[measurements] = chunk[measurements].astype('float64')
+        return chunk[['date', 'city'] + [c for c in chunk.columns if c not in ('date', 'city')]]
+
+    def load(self, cities=None, start=None, end=None, columns=None, chunksize=None):
+        """Load observations for the given cities and date range
+
+        Only the requested measurement columns are read. With `chunksize`, an
+        iterator of frames is returned instead of a single frame.
+        """
+        sql, params = self._query(cities, start, end, columns)
+        if chunksize:
+            return self._iter_chunks(sql, params, chunksize)
+        with self._connect() as conn:
+            return self._to_frame(pd.read_sql_query(sql, conn, params=params))
+
+    def _iter_chunks(self, sql, params, chunksize):
+        with self._connect() as conn:
+            for chunk in pd.read_sql_query(sql, conn, params=params, chunksize=chunksize):
+                yield self._to_frame(chunk)
+
+    def cities(self):
+        """Return the cities that have stored observations"""
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute("SELECT DISTINCT city FROM observations ORDER BY city")]
+
+    def count(self, city=None):
+        """Return the number of stored observations, optionally for one city"""
+        with self._connect() as conn:
+            if city is None:
+                return conn.execute("SELECT COUNT(*) FROM observations").fetchone()[0]
+            return conn.execute("SELECT COUNT(*) FROM observations WHERE city = ?", (city,)).fetchone()[0]
@@ -0,0 +1,199 @@
+import numpy as np
+import pandas as pd
+
+class StreamingMoments:
+    """Mergeable running means, variances, covariances and correlations of a set of columns
+
+    Chunks are folded in with `update` and partial results from other
+    partitions (e.g. cities, files or worker processes) with `merge`, using the
+    pairwise form of Welford's/Chan's update: each chunk is centred on its own
+    means before its sums of products are taken, and the partial moments are
+    combined with a correction for the difference of their means, so nothing
+    is accumulated as raw sums of squares. Like `DataFrame.corr()`, every
+    pair of columns is computed over the rows where both are present, so the
+    results match pandas on the concatenated data.
+    """
+
+    def __init__(self, columns):
+        k = len(columns)
+        self.columns = list(columns)
+        # [i, j] holds statistics of column i over the rows where columns i and j are both present
+        self.count = np.zeros((k, k))
+        self.mean = np.zeros((k, k))
+        self.m2 = np.zeros((k, k))
+        self.comoment = np.zeros((k, k))
+
+    @staticmethod
+    def _chunk_moments(values):
+        valid = ~np.isnan(values)
+        weights = valid.astype('float64')
+        present = valid.sum(axis=0)
+        shift = np.where(valid, values, 0.0).sum(axis=0) / np.maximum(present, 1)
+        x = np.where(valid, values - shift, 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            count = weights.T @ weights
+            sums = x.T @ weights
+            centred_mean = np.where(count > 0, sums / count, 0.0)
+            m2 = np.where(count > 0, (x * x).T @ weights - sums * centred_mean, 0.0)
+            comoment = np.where(count > 0, x.T @ x - sums * sums.T / count, 0.0)
+        return count, centred_mean + shift[:, np.newaxis], m2, comoment
+
+    def _combine(self, count, mean, m2, comoment):
+        total = self.count + count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            share = np.where(total > 0, count / total, 0.0)
+            cross = np.where(total > 0, self.count * count / total, 0.0)
+        delta = mean - self.mean
+        self.mean = self.mean + delta * share
+        self.m2 = self.m2 + m2 + delta * delta * cross
+        self.comoment = self.comoment + comoment + delta * delta.T * cross
+        self.count = total
+
+    def update(self, chunk):
+        """Fold in a DataFrame chunk (or a 2-D array with the columns in order); returns self"""
+        if isinstance(chunk, pd.DataFrame):
+            chunk = chunk[self.columns].to_numpy(dtype='float64')
+        values = np.asarray(chunk, dtype='float64')
+        if len(values):
+            self._combine(*self._chunk_moments(values))
+        return self
+
+    def merge(self, other):
+        """Fold in the moments accumulated by another instance over the same columns; returns self"""
+        if other.columns != self.columns:
+            raise ValueError("Cannot merge moments of different columns")
+        self._combine(other.count, other.mean, other.m2, other.comoment)
+        return self
+
+    @classmethod
+    def from_chunks(cls, chunks, columns):
+        moments = cls(columns)
+        for chunk in chunks:
+            moments.update(chunk)
+        return moments
+
+    def n(self):
+        return pd.Series(np.diag(self.count).astype('int64'), index=self.columns)
+
+    def means(self):
+        return pd.Series(np.where(np.diag(self.count) > 0, np.diag(self.mean), np.nan), index=self.columns)
+
+    def var(self, ddof=1):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            dof = np.diag(self.count) - ddof
+            return pd.Series(np.where(dof > 0, np.diag(self.m2) / dof, np.nan), index=self.columns)
+
+    def std(self, ddof=1):
+        return np.sqrt(self.var(ddof))
+
+    def cov(self, ddof=1):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            dof = self.count - ddof
+            cov = np.where(dof > 0, self.comoment / dof, np.nan)
+        return pd.DataFrame(cov, index=self.columns, columns=self.columns)
+
+    def corr(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            scale = np.sqrt(self.m2 * self.m2.T)
+            corr = np.where((self.count > 1) & (scale > 0), self.comoment / scale, np.nan)
+        corr = np.clip(corr, -1.0, 1.0)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+def partition_moments(chunks, columns, by=None):
+    """Accumulate StreamingMoments per value of `by` (e.g. 'city') over an iterable of chunks
+
+    Returns {partition: StreamingMoments}; with `by=None` everything goes under None.
+    Merge the values (`StreamingMoments.merge`) for whole-dataset statistics.
+    """
+    partitions = {}
+    for chunk in chunks:
+        groups = [(None, chunk)] if by is None else chunk.groupby(by, observed=True, sort=False)
+        for key, group in groups:
+            if key not in partitions:
+                partitions[key] = StreamingMoments(columns)
+            partitions[key].update(group)
+    return partitions
+
+def merge_partitions(results):
+    """Merge a list of {partition: StreamingMoments} dicts, e.g. from parallel workers"""
+    merged = {}
+    for result in results:
+        for key, moments in result.items():
+            if key in merged:
+                merged[key].merge(moments)
+            else:
+                merged[key] = moments
+    return merged
+
+def _scan_row_groups(path, row_groups, columns, by):
+    import pyarrow.parquet as pq
+    reader = pq.ParquetFile(path)
+    read = columns + ([by] if by is not None else [])
+    chunks = (reader.read_row_group(i, columns=read).to_pandas() for i in row_groups)
+    return partition_moments(chunks, columns, by)
+
+def moments_from_parquet(path, columns, by=None, n_jobs=-1):
+    """Out-of-core moments of a Parquet file, per partition of `by`
+
+    Row groups are split across worker processes; each worker reads one row
+    group at a time and the per-worker results are merged, so memory is bounded
+    by the row group size whatever the file size.
+    """
+    from joblib import Parallel, delayed
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Reading Parquet requires pyarrow (pip install pyarrow)") from None
+    n_groups = pq.ParquetFile(path).metadata.num_row_groups
+    if n_groups == 0:
+        return {}
+    batches = [list(batch) for batch in np.array_split(np.arange(n_groups), min(n_groups, 64)) if len(batch)]
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_scan_row_groups)(path, batch, list(columns), by) for batch in batches
+    )
+    return merge_partitions(results)
+
+def rolling_moments(values, window):
+    """Trailing rolling mean and sample std of a 1-D array, both from one pass
+
+    Matches `Series.rolling(window).mean()` / `.std()`: the first window - 1
+    positions and windows containing a NaN are NaN. Values are centred before
+    the cumulative sums are taken, which keeps the window differences accurate.
+    """
+    values = np.asarray(values, dtype='float64')
+    mean = np.full(len(values), np.nan)
+    std = np.full(len(values), np.nan)
+    if len(values) < window:
+        return mean, std
+    valid = ~np.isnan(values)
+    shift = values[valid].mean() if valid.any() else 0.0
+    x = np.where(valid, values - shift, 0.0)
+    sums = np.concatenate([[0.0], np.cumsum(x)])
+    squares = np.concatenate([[0.0], np.cumsum(x * x)])
+    gaps = np.concatenate([[0], np.cumsum(~valid)])
+    s1 = sums[window:] - sums[:-window]
+    s2 = squares[window:] - squares[:-window]
+    complete = gaps[window:] == gaps[:-window]
+    mean[window - 1:] = np.where(complete, s1 / window + shift, np.nan)
+    if window > 1:
+        var = np.maximum(s2 - s1 * s1 / window, 0.0) / (window - 1)
+        std[window - 1:] = np.where(complete, np.sqrt(var), np.nan)
+    return mean, std
+
+class RollingMoments:
+    """Trailing rolling mean and std over a stream of chunks of one series
+
+    Keeps the last `window - 1` values between calls, so `update` returns,
+    for each chunk, exactly what `rolling_moments` gives on the whole series.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self._tail = np.empty(0)
+
+    def update(self, values):
+        values = np.asarray(values, dtype='float64')
+        joined = np.concatenate([self._tail, values])
+        mean, std = rolling_moments(joined, self.window)
+        self._tail = joined[-(self.window - 1):] if self.window > 1 else np.empty(0)
+        return mean[len(joined) - len(values):], std[len(joined) - len(values):]
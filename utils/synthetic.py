@@ -0,0 +1,205 @@
+"""Vectorized synthetic weather generator for load tests and benchmarks
+
+Run with: python -m utils.synthetic --cities 100 --years 5 --freq 10min --output data/synthetic.parquet
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+MEASUREMENTS = ['temperature', 'humidity', 'pressure', 'wind_speed']
+
+# Correlation of the hourly innovations of (temperature, humidity, pressure):
+# warm spells are drier, low pressure brings humid air
+INNOVATION_CORRELATION = np.array([
+    [1.0, -0.6, -0.2],
+    [-0.6, 1.0, -0.5],
+    [-0.2, -0.5, 1.0],
+])
+
+class SyntheticWeatherGenerator:
+    """Generates N cities x M years of weather at a fixed frequency, one chunk at a time
+
+    Each city gets its own climate: base temperature, seasonal and diurnal
+    amplitudes (southern-hemisphere cities have the seasons flipped), base
+    humidity and pressure. On top of the deterministic cycles, temperature,
+    humidity and pressure anomalies follow AR(1) processes with correlated
+    innovations; their hourly persistence is rescaled to the chosen frequency.
+    Sensor outages are injected as runs of missing rows (`gap_rate` outage
+    starts per row, `gap_length` mean length in rows), either as NaN
+    measurements or dropped rows.
+
+    Rows are ordered by time, then city, and generated in blocks of about
+    `chunk_rows` rows. AR and outage state is carried between blocks, so
+    memory stays bounded by the chunk size whatever the total length.
+    """
+
+    def __init__(self, n_cities=10, years=1, freq='h', start='2020-01-01', seed=42,
+                 persistence=0.95, gap_rate=0.0005, gap_length=6, gap_mode='nan', chunk_rows=1_000_000):
+        if gap_mode not in ('nan', 'drop'):
+            raise ValueError("gap_mode must be 'nan' or 'drop'")
+        self.n_cities = n_cities
+        self.years = years
+        self.freq = freq
+        self.start = pd.Timestamp(start)
+        self.seed = seed
+        self.persistence = persistence
+        self.gap_rate = gap_rate
+        self.gap_length = gap_length
+        self.gap_mode = gap_mode
+        self.chunk_rows = chunk_rows
+
+        self.step = pd.Timedelta(pd.tseries.frequencies.to_offset(freq))
+        end = self.start + pd.DateOffset(years=years)
+        self.periods = int((end - self.start) / self.step)
+        self.city_names = [f'City {i + 1}' for i in range(n_cities)]
+        self.climate = self._climate(np.random.default_rng(seed))
+
+    @property
+    def rows(self):
+        """Number of rows before gaps are applied"""
+        return self.periods * self.n_cities
+
+    def _climate(self, rng):
+        n = self.n_cities
+        return {
+            'base_temperature': rng.uniform(0, 25, n),
+            'seasonal_amplitude': rng.uniform(3, 15, n) * np.where(rng.random(n) < 0.2, -1, 1),
+            'diurnal_amplitude': rng.uniform(2, 8, n),
+            'base_humidity': rng.uniform(45, 80, n),
+            'base_pressure': rng.uniform(1005, 1020, n),
+            'base_wind': rng.uniform(2, 6, n),
+        }
+
+    def _ar_filter(self, innovations, phi, state):
+        """Run x_t = phi * x_(t-1) + e_t down axis 0 for every column, starting from state"""
+        from scipy.signal import lfilter
+        values, final = lfilter([1.0], [1.0, -phi], innovations, axis=0, zi=phi * state[np.newaxis, :])
+        return values, final[0]
+
+    def _gap_mask(self, rng, steps, carry):
+        """Outage mask for a (steps, cities) block; carry is how far earlier outages reach into it"""
+        starts = rng.random((steps, self.n_cities)) < self.gap_rate
+        lengths = rng.geometric(1 / self.gap_length, (steps, self.n_cities))
+        t = np.arange(steps)[:, np.newaxis]
+        reach = np.where(starts, t + lengths, 0)
+        # Row t is missing while the furthest outage started at or before t still covers it
+        reach = np.maximum(np.maximum.accumulate(reach, axis=0), carry[np.newaxis, :])
+        return reach > t, np.maximum(reach[-1] - steps, 0)
+
+    def iter_chunks(self):
+        """Yield DataFrames of date, city and measurements in time order"""
+        rng = np.random.default_rng(self.seed + 1)
+        climate = self.climate
+        n = self.n_cities
+        hours_per_step = self.step / pd.Timedelta(hours=1)
+        # AR coefficients per step; pressure anomalies persist longest, humidity least
+        phis = np.array([self.persistence, self.persistence ** 1.5, self.persistence ** 0.25]) ** hours_per_step
+        scales = np.array([1.5, 6.0, 4.0]) * np.sqrt(1 - phis ** 2)
+        chol = np.linalg.cholesky(INNOVATION_CORRELATION)
+        state = np.zeros((3, n))
+        gap_carry = np.zeros(n, dtype='int64')
+        categories = pd.CategoricalDtype(self.city_names)
+        city_codes = np.arange(n, dtype='int32')
+
+        steps_per_chunk = max(1, self.chunk_rows // n)
+        for offset in range(0, self.periods, steps_per_chunk):
+            steps = min(steps_per_chunk, self.periods - offset)
+            times = pd.date_range(self.start + self.step * offset, periods=steps, freq=self.step)
+            day = (times.dayofyear.to_numpy() - 1 + times.hour.to_numpy() / 24)[:, np.newaxis]
+            hour = (times.hour.to_numpy() + times.minute.to_numpy() / 60)[:, np.newaxis]
+
+            # Correlated innovations, then one AR(1) filter per variable over the whole block
+            innovations = rng.standard_normal((steps, n, 3)) @ chol.T
+            anomalies = []
+            for k in range(3):
+                values, state[k] = self._ar_filter(innovations[:, :, k] * scales[k], phis[k], state[k])
+                anomalies.append(values)
+            temp_anomaly, humidity_anomaly, pressure_anomaly = anomalies
+
+            seasonal = np.sin(2 * np.pi * (day - 105) / 365.25) * climate['seasonal_amplitude']
+            diurnal = np.sin(2 * np.pi * (hour - 9) / 24) * climate['diurnal_amplitude']
+            temperature = climate['base_temperature'] + seasonal + diurnal + temp_anomaly
+            # Relative humidity drops in the warm part of the day
+            humidity = np.clip(climate['base_humidity'] - 1.2 * diurnal + humidity_anomaly, 5, 100)
+            pressure = climate['base_pressure'] + pressure_anomaly
+            wind_speed = np.abs(climate['base_wind'] - 0.3 * pressure_anomaly + rng.normal(0, 1.5, (steps, n)))
+
+            chunk = pd.DataFrame({
+                'date': np.repeat(times.to_numpy(), n),
+                'city': pd.Categorical.from_codes(np.tile(city_codes, steps), dtype=categories),
+                'temperature': temperature.ravel().astype('float32'),
+                'humidity': humidity.ravel().astype('float32'),
+                'pressure': pressure.ravel().astype('float32'),
+                'wind_speed': wind_speed.ravel().astype('float32'),
+            })
+
+            if self.gap_rate > 0:
+                missing, gap_carry = self._gap_mask(rng, steps, gap_carry)
+                missing = missing.ravel()
+                if self.gap_mode == 'drop':
+                    chunk = chunk[~missing].reset_index(drop=True)
+                else:
+                    chunk.loc[missing, MEASUREMENTS] = np.nan
+            yield chunk
+
+    def to_frame(self):
+        """Generate everything into one DataFrame (only for sizes that fit in memory)"""
+        return pd.concat(self.iter_chunks(), ignore_index=True)
+
+    def to_parquet(self, path, compression='snappy'):
+        """Stream all chunks into one Parquet file in bounded memory; returns rows, chunks and timing"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Writing Parquet requires pyarrow (pip install pyarrow)") from None
+
+        start = time.perf_counter()
+        rows = chunks = 0
+        writer = None
+        try:
+            for chunk in self.iter_chunks():
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema, compression=compression)
+                writer.write_table(table)
+                rows += len(chunk)
+                chunks += 1
+        finally:
+            if writer is not None:
+                writer.close()
+        seconds = time.perf_counter() - start
+        return {'path': path, 'rows': rows, 'chunks': chunks, 'seconds': seconds, 'rows_per_sec': rows / seconds}
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic multi-city weather data")
+    parser.add_argument('--cities', type=int, default=10)
+    parser.add_argument('--years', type=int, default=1)
+    parser.add_argument('--freq', default='h', help="Row frequency, e.g. 'h' or '10min'")
+    parser.add_argument('--start', default='2020-01-01')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--gap-rate', type=float, default=0.0005)
+    parser.add_argument('--gap-mode', choices=['nan', 'drop'], default='nan')
+    parser.add_argument('--chunk-rows', type=int, default=1_000_000)
+    parser.add_argument('--output', required=True, help="Parquet (.parquet) or CSV file to write")
+    args = parser.parse_args()
+
+    generator = SyntheticWeatherGenerator(
+        args.cities, args.years, args.freq, args.start, args.seed,
+        gap_rate=args.gap_rate, gap_mode=args.gap_mode, chunk_rows=args.chunk_rows
+    )
+    print(f"Generating {generator.rows:,} rows ({args.cities} cities x {generator.periods:,} steps)")
+    if args.output.endswith('.parquet'):
+        stats = generator.to_parquet(args.output)
+    else:
+        start = time.perf_counter()
+        rows = 0
+        for i, chunk in enumerate(generator.iter_chunks()):
+            chunk.to_csv(args.output, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+            rows += len(chunk)
+        stats = {'rows': rows, 'seconds': time.perf_counter() - start}
+    print(f"Wrote {stats['rows']:,} rows to {args.output} in {stats['seconds']:.1f}s")
+
+if __name__ == '__main__':
+    main()
@@ -1,40 +1,136 @@
-import plotly.express as px
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
 
+from utils.features import date_values, grouped_rolling
+from utils.instrumentation import METRICS
+from utils.streaming_stats import StreamingMoments, rolling_moments
+
+# Series longer than this are downsampled and drawn with WebGL (Scattergl)
+MAX_POINTS = 5000
+
+def _bucket_edges(n, buckets):
+    return np.linspace(0, n, buckets + 1).astype('int64')[:-1]
+
+def minmax_indices(y, n_out):
+    """Indices of the minimum and maximum of each of n_out / 2 equal-width buckets, in order"""
+    y = np.asarray(y, dtype='float64')
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+    buckets = max(1, n_out // 2)
+    size = n // buckets
+    block = y[:buckets * size].reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    # NaNs never win a bucket; all-NaN buckets fall back to their first row
+    lows = np.argmin(np.where(np.isnan(block), np.inf, block), axis=1) + offsets
+    highs = np.argmax(np.where(np.isnan(block), -np.inf, block), axis=1) + offsets
+    return np.unique(np.concatenate([[0], lows, highs, [n - 1]]))
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets selection of n_out points that preserves the visual shape
+
+    Loops over the n_out buckets (not the rows); each bucket is one vectorized
+    triangle-area computation against the previous pick and the next bucket mean.
+    """
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype('int64')
+    valid = ~np.isnan(y)
+    # Buckets span [edges[i], edges[i + 1]); cut the arrays at the last edge so the
+    # final bucket does not run on to the end
+    end = edges[-1]
+    counts = np.maximum(np.add.reduceat(valid[:end], edges[:-1]), 1)
+    mean_x = np.add.reduceat(x[:end], edges[:-1]) / np.diff(edges)
+    mean_y = np.add.reduceat(np.where(valid, y, 0.0)[:end], edges[:-1]) / counts
+    # The bucket after the last is the final point itself
+    mean_x = np.append(mean_x, x[-1])
+    mean_y = np.append(mean_y, y[-1] if valid[-1] else mean_y[-1])
+
+    selected = np.empty(n_out, dtype='int64')
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a] if valid[a] else mean_y[i]
+        area = np.abs((ax - mean_x[i + 1]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (mean_y[i + 1] - ay))
+        a = lo + (int(np.nanargmax(area)) if valid[lo:hi].any() else 0)
+        selected[i + 1] = a
+    return selected
+
+def downsample_indices(x, y, n_out, method='minmax'):
+    """Row indices to plot for a series of at most about n_out points ('minmax' or 'lttb')"""
+    if method == 'lttb':
+        return lttb_indices(x, y, n_out)
+    if method == 'minmax':
+        return minmax_indices(y, n_out)
+    raise ValueError("method must be 'minmax' or 'lttb'")
+
+def _as_numeric(x):
+    x = np.asarray(x)
+    return x.astype('int64') if np.issubdtype(x.dtype, np.datetime64) else x
+
 class WeatherVisualizer:
     @staticmethod
-    def plot_temperature_trend(df):
-        """Plot historical temperature trend with confidence intervals"""
+    @METRICS.timed('figure_build_seconds', figure='temperature_trend')
+    def plot_temperature_trend(df, max_points=MAX_POINTS, method='minmax'):
+        """Plot historical temperature trend with confidence intervals
+
+        Series longer than `max_points` are drawn with WebGL traces: the
+        temperature line is downsampled with min-max (or LTTB) selection and the
+        rolling band, computed once at full resolution, is reduced to its
+        per-bucket envelope, so the figure size does not grow with the data.
+        In a multi-city frame the rolling statistics are taken within each
+        city, so the band never mixes readings from different stations.
+        """
         fig = go.Figure()
+        dates = date_values(df).to_numpy()
+        temperature = df['temperature'].to_numpy(dtype='float64')
+
+        # Calculate rolling mean and std in one pass, within each city if there are several
+        if 'city' in df.columns:
+            codes = pd.factorize(df['city'])[0]
+            rolling_mean, rolling_std = grouped_rolling(temperature, codes, 7)
+        else:
+            rolling_mean, rolling_std = rolling_moments(temperature, 7)
+        upper = rolling_mean + 2*rolling_std
+        lower = rolling_mean - 2*rolling_std
+
+        Scatter = go.Scatter
+        band_dates = dates
+        if len(df) > max_points:
+            Scatter = go.Scattergl
+            keep = downsample_indices(_as_numeric(dates), temperature, max_points, method)
+            starts = _bucket_edges(len(df), max_points // 2)
+            band_dates = dates[starts]
+            upper = np.fmax.reduceat(upper, starts)
+            lower = np.fmin.reduceat(lower, starts)
+            dates, temperature = dates[keep], temperature[keep]
 
         # Add temperature line
-        fig.add_trace(go.Scatter(
-            x=df['date'],
-            y=df['temperature'],
+        fig.add_trace(Scatter(
+            x=dates,
+            y=temperature,
             name='Temperature',
             line=dict(color='rgb(31, 119, 180)'),
         ))
 
-        # Calculate rolling mean and std
-        rolling_mean = df['temperature'].rolling(window=7).mean()
-        rolling_std = df['temperature'].rolling(window=7).std()
-
         # Add confidence intervals
-        fig.add_trace(go.Scatter(
-            x=df['date'],
-            y=rolling_mean + 2*rolling_std,
+        fig.add_trace(Scatter(
+            x=band_dates,
+            y=upper,
             fill=None,
             mode='lines',
             line_color='rgba(31, 119, 180, 0)',
             showlegend=False,
         ))
 
-        fig.add_trace(go.Scatter(
-            x=df['date'],
-            y=rolling_mean - 2*rolling_std,
+        fig.add_trace(Scatter(
+            x=band_dates,
+            y=lower,
             fill='tonexty',
             mode='lines',
             line_color='rgba(31, 119, 180, 0)',
@@ -51,29 +147,31 @@ class WeatherVisualizer:
         return fig
 
     @staticmethod
+    @METRICS.timed('figure_build_seconds', figure='correlation_matrix')
     def plot_correlation_matrix(df):
-        """Plot enhanced correlation matrix of weather parameters"""
-        correlation = df[['temperature', 'humidity', 'pressure']].corr()
+        """Plot enhanced correlation matrix of weather parameters
+
+        `df` is a weather frame or a `StreamingMoments` accumulated over the
+        chunks or partitions of a dataset too large to load, e.g. with
+        `moments_from_parquet`.
+        """
+        # plotly.express is slow to import and only needed here
+        import plotly.express as px
+        moments = df
+        if not isinstance(moments, StreamingMoments):
+            moments = StreamingMoments(['temperature', 'humidity', 'pressure']).update(df)
+        correlation = moments.corr()
         
+        # Cell values are rendered by the heatmap itself, in a colour contrasting with each cell
         fig = px.imshow(
             correlation,
             labels=dict(color="Correlation"),
             title="Weather Parameter Correlations",
             color_continuous_scale='RdBu_r',
-            aspect='auto'
+            aspect='auto',
+            text_auto='.2f'
         )
         
-        # Add correlation values as text
-        for i in range(len(correlation.index)):
-            for j in range(len(correlation.columns)):
-                fig.add_annotation(
-                    x=i,
-                    y=j,
-                    text=f"{correlation.iloc[i, j]:.2f}",
-                    showarrow=False,
-                    font=dict(color='black' if abs(correlation.iloc[i, j]) < 0.7 else 'white')
-                )
-        
         fig.update_layout(
             width=600,
             height=500
@@ -81,44 +179,69 @@ class WeatherVisualizer:
         return fig
 
     @staticmethod
-    def plot_prediction_results(actual, predicted, dates):
-        """Plot actual vs predicted temperatures with confidence intervals"""
+    @METRICS.timed('figure_build_seconds', figure='prediction_results')
+    def plot_prediction_results(actual, predicted, dates, lower=None, upper=None,
+                                interval_label='95% Prediction Interval',
+                                max_points=MAX_POINTS, method='minmax'):
+        """Plot actual vs predicted temperatures with the model's prediction intervals
+
+        Points are drawn in date order. Beyond `max_points` rows, WebGL traces
+        are used and every series is drawn at the union of the rows selected
+        from the actual and the predicted values.
+        """
         fig = go.Figure()
-        
-        # Calculate prediction intervals (mock data for demonstration)
-        confidence = 0.1 * np.std(predicted) * np.random.randn(len(predicted))
+        dates = np.asarray(dates)
+        order = np.argsort(dates, kind='stable')
+        columns = {'actual': actual, 'predicted': predicted, 'lower': lower, 'upper': upper}
+        values = {
+            name: np.asarray(column, dtype='float64')[order]
+            for name, column in columns.items() if column is not None
+        }
+        dates = dates[order]
+
+        Scatter = go.Scatter
+        if len(dates) > max_points:
+            Scatter = go.Scattergl
+            x = _as_numeric(dates)
+            keep = np.union1d(
+                downsample_indices(x, values['actual'], max_points // 2, method),
+                downsample_indices(x, values['predicted'], max_points // 2, method)
+            )
+            dates = dates[keep]
+            values = {name: column[keep] for name, column in values.items()}
         
         # Add actual values
-        fig.add_trace(go.Scatter(
+        fig.add_trace(Scatter(
             x=dates,
-            y=actual,
+            y=values['actual'],
             name='Actual',
             mode='lines+markers',
             line=dict(color='blue')
         ))
         
-        # Add predicted values with confidence intervals
-        fig.add_trace(go.Scatter(
-            x=dates,
-            y=predicted + 2*confidence,
-            mode='lines',
-            line=dict(width=0),
-            showlegend=False
-        ))
-        
-        fig.add_trace(go.Scatter(
-            x=dates,
-            y=predicted - 2*confidence,
-            mode='lines',
-            line=dict(width=0),
-            fillcolor='rgba(255, 0, 0, 0.2)',
-            fill='tonexty',
-            name='95% Confidence Interval'
-        ))
+        # Add prediction intervals (e.g. from WeatherPredictor.predict_interval)
+        if 'lower' in values and 'upper' in values:
+            fig.add_trace(Scatter(
+                x=dates,
+                y=values['upper'],
+                mode='lines',
+                line=dict(width=0),
+                showlegend=False
+            ))
+            
+            fig.add_trace(Scatter(
+                x=dates,
+                y=values['lower'],
+                mode='lines',
+                line=dict(width=0),
+                fillcolor='rgba(255, 0, 0, 0.2)',
+                fill='tonexty',
+                name=interval_label
+            ))
         
-        fig.add_trace(go.Scatter(
+        fig.add_trace(Scatter(
             x=dates,
-            y=predicted,
+            y=values['predicted'],
             name='Predicted',
             mode='lines+markers',
             line=dict(color='red')
@@ -135,6 +258,7 @@ class WeatherVisualizer:
         return fig
 
     @staticmethod
+    @METRICS.timed('figure_build_seconds', figure='feature_importance')
     def plot_feature_importance(feature_importance_df):
         """Plot enhanced feature importance analysis with detailed metrics"""
         # Calculate relative importance percentage
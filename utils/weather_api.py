@@ -1,11 +1,280 @@
+import logging
 import os
+import threading
+import time
+import pandas as pd
 import requests
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.cache import TTLCache
+from utils.instrumentation import METRICS
+
+logger = logging.getLogger(__name__)
+
+# Column name and dtype of every field kept from a 3-hourly forecast entry
+FORECAST_COLUMNS = {
+    'main_temp': ('temperature', 'float64'),
+    'main_feels_like': ('feels_like', 'float64'),
+    'main_temp_min': ('temp_min', 'float64'),
+    'main_temp_max': ('temp_max', 'float64'),
+    'main_humidity': ('humidity', 'float64'),
+    'main_pressure': ('pressure', 'float64'),
+    'main_sea_level': ('sea_level', 'float64'),
+    'main_grnd_level': ('grnd_level', 'float64'),
+    'wind_speed': ('wind_speed', 'float64'),
+    'wind_deg': ('wind_deg', 'float64'),
+    'wind_gust': ('wind_gust', 'float64'),
+    'clouds_all': ('clouds', 'float64'),
+    'visibility': ('visibility', 'float64'),
+    'pop': ('pop', 'float64'),
+    'rain_3h': ('rain_3h', 'float64'),
+    'snow_3h': ('snow_3h', 'float64'),
+    'weather_id': ('weather_id', 'Int64'),
+    'weather_main': ('weather_main', 'category'),
+    'weather_description': ('description', 'category'),
+    'weather_icon': ('icon', 'category'),
+}
+
+class RateLimiter:
+    """Thread-safe token bucket allowing `rate` calls per second"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
 
 class WeatherAPI:
-    def __init__(self):
+    def __init__(self, cache_ttl=600, cache_size=256, timeout=10, max_retries=3,
+                 backoff_factor=0.5, pool_size=10, rate_limit=None, store=None):
         self.api_key = os.getenv('OPENWEATHERMAP_API_KEY')
         self.base_url = "http://api.openweathermap.org/data/2.5"
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl, name='weather_api')
+        self.rate_limiter = RateLimiter(rate_limit) if rate_limit else None
+        self.store = store
+        self.session = self._build_session(max_retries, backoff_factor, pool_size)
+
+    @staticmethod
+    def _build_session(max_retries, backoff_factor, pool_size):
+        """Create a keep-alive session that retries transient failures with backoff"""
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=['GET'],
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            max_retries=retry,
+            pool_connections=pool_size,
+            pool_maxsize=pool_size
+        )
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _fetch(self, endpoint, city, country):
+        """Return the JSON payload for an endpoint, served from cache when fresh
+
+        Returns (data, fetched), where `fetched` is False for a cached payload.
+        """
+        key = (city.strip().lower(), country.strip().lower(), endpoint)
+        data = self.cache.get(key)
+        if data is not None:
+            return data, False
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        with METRICS.timer('weather_api_request_seconds', endpoint=endpoint):
+            response = self.session.get(
+                f"{self.base_url}/{endpoint}",
+                params={
+                    'q': f"{city},{country}",
+                    'appid': self.api_key,
+                    'units': 'metric'
+                },
+                timeout=self.timeout
+            )
+        METRICS.inc('weather_api_requests_total', endpoint=endpoint, status=response.status_code)
+        response.raise_for_status()
+        data = response.json()
+        self.cache.set(key, data)
+        return data, True
+
+    def cache_stats(self):
+        """Return hit/miss counters for the response cache"""
+        return self.cache.stats()
+
+    @staticmethod
+    def _parse_current(data):
+        """Extract the fields shown in the app from a current weather payload"""
+        return {
+            'temperature': round(data['main']['temp'], 1),
+            'feels_like': round(data['main']['feels_like'], 1),
+            'humidity': data['main']['humidity'],
+            'pressure': data['main']['pressure'],
+            'description': data['weather'][0]['description'].capitalize(),
+            'icon': data['weather'][0]['icon'],
+            'wind_speed': data['wind']['speed'],
+            # Observation time reported by the API, which may be minutes old (or served from cache)
+            'timestamp': datetime.fromtimestamp(data['dt']).strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+    @staticmethod
+    def _parse_forecast(data):
+        """Reduce a forecast payload to the first forecast of each of the next 5 days"""
+        forecasts = []
+        seen_dates = set()
+        
+        for item in data['list']:
+            forecast_date = datetime.fromtimestamp(item['dt'])
+            date_key = forecast_date.date()
+            
+            if date_key not in seen_dates:
+                seen_dates.add(date_key)
+                forecasts.append({
+                    'timestamp': forecast_date,
+                    'temperature': round(item['main']['temp'], 1),
+                    'description': item['weather'][0]['description'].capitalize(),
+                    'icon': item['weather'][0]['icon'],
+                    'humidity': item['main']['humidity'],
+                    'wind_speed': item['wind']['speed']
+                })
+                
+                # Stop after getting 5 days of forecasts
+                if len(forecasts) >= 5:
+                    break
+        
+        return forecasts
+
+    @staticmethod
+    def _parse_forecast_frame(data):
+        """Convert a forecast payload into a typed DataFrame with one row per 3-hour slot"""
+        items = data['list']
+        frame = pd.json_normalize(items, sep='_')
+        if 'weather' in frame:
+            weather = pd.json_normalize(frame.pop('weather').str[0].tolist())
+            frame = frame.join(weather.add_prefix('weather_'))
+
+        timestamps = pd.to_datetime(frame['dt'], unit='s', utc=True)
+        offset = data.get('city', {}).get('timezone')
+        if offset is not None:
+            timestamps = timestamps.dt.tz_convert(timezone(timedelta(seconds=offset)))
+
+        frame = frame.reindex(columns=list(FORECAST_COLUMNS))
+        frame.columns = [name for name, _ in FORECAST_COLUMNS.values()]
+        frame['description'] = frame['description'].str.capitalize()
+        frame = frame.astype({name: dtype for name, dtype in FORECAST_COLUMNS.values()})
+        frame.insert(0, 'timestamp', timestamps)
+        return frame
+
+    @staticmethod
+    def summarize_forecast_daily(frame):
+        """Aggregate a 3-hourly forecast frame into daily min/max/mean statistics"""
+        if frame is None or frame.empty:
+            return frame
+        day = frame['timestamp'].dt.floor('D').rename('date')
+        return frame.groupby(day, sort=True).agg(
+            temp_min=('temp_min', 'min'),
+            temp_max=('temp_max', 'max'),
+            temp_mean=('temperature', 'mean'),
+            humidity_mean=('humidity', 'mean'),
+            pressure_mean=('pressure', 'mean'),
+            wind_speed_mean=('wind_speed', 'mean'),
+            wind_speed_max=('wind_speed', 'max'),
+            clouds_mean=('clouds', 'mean'),
+            pop_max=('pop', 'max'),
+            rain_total=('rain_3h', 'sum'),
+            snow_total=('snow_3h', 'sum'),
+            description=('description', 'first'),
+            icon=('icon', 'first'),
+            slots=('temperature', 'size')
+        ).reset_index()
+
+    def _record(self, city, data):
+        """Append a newly fetched current-weather payload to the observation store, if one is attached
+
+        Readings are stored under the city name the API reports, so lookups
+        that differ only in case or spacing share one series.
+        """
+        if self.store is None:
+            return
+        try:
+            self.store.append_reading(data.get('name') or ' '.join(city.split()).title(), data)
+        except Exception as e:
+            logger.error(f"Error saving observation for {city}: {str(e)}")
+
+    def _fetch_many(self, endpoint, parse, cities, country, max_workers):
+        """Fetch an endpoint for many cities concurrently, collecting per-city errors"""
+        locations = [
+            (c, country) if isinstance(c, str) else tuple(c)
+            for c in cities
+        ]
+
+        def fetch_one(location):
+            city, city_country = location
+            try:
+                data, fetched = self._fetch(endpoint, city, city_country)
+                if endpoint == 'weather' and fetched:
+                    self._record(city, data)
+                return location, parse(data), None
+            except requests.exceptions.HTTPError as e:
+                return location, None, f"HTTP {e.response.status_code}: {str(e)}"
+            except Exception as e:
+                return location, None, str(e)
+
+        start = time.perf_counter()
+        results = {}
+        errors = {}
+        workers = max(1, min(max_workers or self.pool_size, len(locations) or 1))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for location, result, error in executor.map(fetch_one, locations):
+                if error is None:
+                    results[location] = result
+                else:
+                    errors[location] = error
+
+        return {
+            'results': results,
+            'errors': errors,
+            'requested': len(locations),
+            'succeeded': len(results),
+            'failed': len(errors),
+            'elapsed': time.perf_counter() - start
+        }
+
+    def get_current_weather_many(self, cities, country="US", max_workers=None):
+        """Fetch current weather for many cities concurrently
+
+        `cities` may contain city names (using `country`) or (city, country) tuples.
+        Results and errors are keyed by (city, country).
+        """
+        return self._fetch_many('weather', self._parse_current, cities, country, max_workers)
+
+    def get_forecast_many(self, cities, country="US", max_workers=None):
+        """Fetch 5-day forecasts for many cities concurrently"""
+        return self._fetch_many('forecast', self._parse_forecast, cities, country, max_workers)
 
     def get_current_weather(self, city="San Francisco", country="US"):
         """Fetch current weather data for a given city"""
@@ -17,75 +286,38 @@ class WeatherAPI:
             if city.lower() in ['texas', 'tx']:
                 city = 'Austin'  # Default to state capital
                 
-            response = requests.get(
-                f"{self.base_url}/weather",
-                params={
-                    'q': f"{city},{country}",
-                    'appid': self.api_key,
-                    'units': 'metric'
-                }
-            )
-            response.raise_for_status()
-            data = response.json()
+            data, fetched = self._fetch('weather', city, country)
+            # Cached payloads were recorded when they were fetched
+            if fetched:
+                self._record(city, data)
             
-            return {
-                'temperature': round(data['main']['temp'], 1),
-                'feels_like': round(data['main']['feels_like'], 1),
-                'humidity': data['main']['humidity'],
-                'pressure': data['main']['pressure'],
-                'description': data['weather'][0]['description'].capitalize(),
-                'icon': data['weather'][0]['icon'],
-                'wind_speed': data['wind']['speed'],
-                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
+            return self._parse_current(data)
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 401:
-                print(f"API Key unauthorized or inactive. Please wait a few hours for the API key to be activated.")
+                logger.warning("API Key unauthorized or inactive. Please wait a few hours for the API key to be activated.")
                 return "API_INACTIVE"
-            print(f"HTTP Error fetching weather data: {str(e)}")
+            logger.error(f"HTTP Error fetching weather data: {str(e)}")
             return None
         except Exception as e:
-            print(f"Unexpected error fetching weather data: {str(e)}")
+            logger.exception(f"Unexpected error fetching weather data: {str(e)}")
             return None
 
     def get_forecast(self, city="San Francisco", country="US"):
         """Fetch 5-day weather forecast data"""
         try:
-            response = requests.get(
-                f"{self.base_url}/forecast",
-                params={
-                    'q': f"{city},{country}",
-                    'appid': self.api_key,
-                    'units': 'metric'
-                }
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            # Process and filter forecasts to get one forecast per day
-            forecasts = []
-            seen_dates = set()
+            data, _ = self._fetch('forecast', city, country)
             
-            for item in data['list']:
-                forecast_date = datetime.fromtimestamp(item['dt'])
-                date_key = forecast_date.date()
-                
-                if date_key not in seen_dates:
-                    seen_dates.add(date_key)
-                    forecasts.append({
-                        'timestamp': forecast_date,
-                        'temperature': round(item['main']['temp'], 1),
-                        'description': item['weather'][0]['description'].capitalize(),
-                        'icon': item['weather'][0]['icon'],
-                        'humidity': item['main']['humidity'],
-                        'wind_speed': item['wind']['speed']
-                    })
-                    
-                    # Stop after getting 5 days of forecasts
-                    if len(forecasts) >= 5:
-                        break
-            
-            return forecasts
+            return self._parse_forecast(data)
+        except Exception as e:
+            logger.error(f"Error fetching forecast data: {str(e)}")
+            return None
+
+    def get_forecast_frame(self, city="San Francisco", country="US", daily=False):
+        """Fetch the full 3-hourly forecast as a DataFrame, or its daily summary"""
+        try:
+            data, _ = self._fetch('forecast', city, country)
+            frame = self._parse_forecast_frame(data)
+            return self.summarize_forecast_daily(frame) if daily else frame
         except Exception as e:
-            print(f"Error fetching forecast data: {str(e)}")
+            logger.error(f"Error fetching forecast data: {str(e)}")
             return None